@@ -12,23 +12,34 @@ under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
 CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError, as_completed
+from functools import lru_cache
 from pathlib import Path
 from shutil import rmtree
 
-import boto3
-
-from lambdaguard.core.Lambda import Lambda
+from lambdaguard.core.IAM import IAM
+from lambdaguard.core.Lambda import Lambda, get_current_fingerprint
 from lambdaguard.core.STS import STS
 from lambdaguard.security.LambdaWrite import LambdaWrite
 from lambdaguard.security.Report import SecurityReport
+from lambdaguard.security.Scan import Scan, get_resource
+from lambdaguard.utils import cache, clients, ratelimit
 from lambdaguard.utils.arnparse import arnparse
 from lambdaguard.utils.cli import align, green, header, nocolor, orange, parse_args
-from lambdaguard.utils.log import configure_log, debug
+from lambdaguard.utils.diskcache import DiskCache
+from lambdaguard.utils.log import append_log, configure_log, debug
 from lambdaguard.utils.paginator import paginate
+from lambdaguard.utils.replay import Recorder, Replayer
 from lambdaguard.visibility.HTMLReport import HTMLReport
-from lambdaguard.visibility.Report import VisibilityReport
+from lambdaguard.visibility.Report import VisibilityReport, load_report
 from lambdaguard.visibility.Statistics import Statistics
 
+# Seconds to wait for a region to report its function count
+REGION_TIMEOUT = 15
+# Fewer functions are scanned with per-entity IAM calls instead of the account snapshot
+SNAPSHOT_MIN_FUNCTIONS = 20
+
 
 def verbose(args, message, end=""):
     """
@@ -38,16 +49,26 @@ def verbose(args, message, end=""):
         print(f"\r{green}{message}{nocolor}".ljust(100, " "), end=end)
 
 
-def get_client(args):
+def warn(message):
+    """
+    Prints formatted message regardless of verbose mode
+    """
+    print(f"\r{orange}{message}{nocolor}".ljust(100, " "))
+
+
+def get_client(args, region=None):
     """
     Returns a Lambda botocore client
     """
-    return boto3.Session(
-        profile_name=args.profile,
-        aws_access_key_id=args.keys[0],
-        aws_secret_access_key=args.keys[1],
-        region_name=args.region,
-    ).client("lambda")
+    return clients.get_client("lambda", region or args.region, args.profile, args.keys[0], args.keys[1])
+
+
+@lru_cache(maxsize=None)
+def get_available_regions():
+    """
+    Returns regions where Lambda is available, loaded once from endpoint data
+    """
+    return clients.get_session().get_available_regions("lambda")
 
 
 def get_regions(args):
@@ -62,9 +83,9 @@ def get_regions(args):
         raise ValueError("No region specified")
     if args.function:
         return [arnparse(args.function).region]
-    available = boto3.Session().get_available_regions("lambda")
+    available = get_available_regions()
     if args.region == "all":
-        return available
+        return list(available)
     regions = args.region.split(",")
     if not regions:
         raise ValueError("No region specified")
@@ -74,41 +95,228 @@ def get_regions(args):
     return regions
 
 
-def get_usage(args):
+def get_function_count(args, region):
+    """
+    Returns number of Lambdas in region
+    """
+    settings = get_client(args, region).get_account_settings()
+    return settings["AccountUsage"]["FunctionCount"]
+
+
+def count_functions(args, regions, counts, listings=None, timeout=None):
+    """
+    Fills counts with number of Lambdas per region, regions queried concurrently
+    Returns regions that did not answer within timeout seconds
+    """
+    answered = set()
+    executor = ThreadPoolExecutor(max_workers=len(regions))
+    futures = {executor.submit(get_function_count, args, region): region for region in regions}
+    try:
+        # Submitted together, so the timeout applies to each region
+        for future in as_completed(futures, timeout=timeout):
+            region = futures[future]
+            answered.add(region)
+            verbose(args, f"Loading regions ({region})")
+            try:
+                counts[region] = future.result()
+            except Exception:
+                debug(region)
+                continue
+            if counts[region] and listings is not None and not (args.function or args.input):
+                listings[region] = list_functions(args, region)
+    except TimeoutError:
+        pass
+    finally:
+        executor.shutdown(wait=False)
+    return [region for region in regions if region not in answered]
+
+
+def get_usage(args, listings=None, skipped=None):
     """
     Returns Python dict with number of Lambdas per region
+    Regions are queried concurrently, each given REGION_TIMEOUT seconds.
+    Regions that time out are queried once more without timeout,
+    if they fail again they are skipped and added to skipped list.
+    If listings dict is given, function listing starts in the background
+    for each region as soon as its count is known.
+    """
+    regions = get_regions(args)
+    counts = {}
+    slow = count_functions(args, regions, counts, listings, timeout=REGION_TIMEOUT)
+    if slow:
+        debug(",".join(slow))
+        verbose(args, f"Retrying regions ({','.join(slow)})", end="\n")
+        count_functions(args, slow, counts, listings)
+        failed = [region for region in slow if region not in counts]
+        if failed:
+            warn(f"Skipped regions not responding: {', '.join(failed)}")
+            if skipped is not None:
+                skipped.extend(failed)
+    # Keep requested order of regions
+    return {region: counts[region] for region in regions if counts.get(region)}
+
+
+def list_functions(args, region):
+    """
+    Returns an iterator over list_functions pages, fetched in the background
     """
-    usage = {}
-    for region in get_regions(args):
-        args.region = region
-        verbose(args, f"Loading regions ({region})")
-        try:
-            client = get_client(args)
-            settings = client.get_account_settings()
-            function_count = settings["AccountUsage"]["FunctionCount"]
-            if function_count:
-                usage[region] = function_count
-        except Exception:
-            debug(region)
-    return usage
+    return paginate(get_client(args, region), "list_functions", prefetch=True)
 
 
-def get_functions(args):
+def get_functions(args, pages=None):
     """
     Generator for listing Lambda functions
-    Yields Lambda function ARNs
+    Yields Lambda function ARNs and configuration from the listing (None if not listed)
     """
     if args.function:
-        yield args.function
+        yield args.function, None
     elif args.input:
         with Path(args.input).open() as f:
             for _ in f.read().split("\n"):
-                yield _
+                yield _, None
     else:
-        client = get_client(args)
-        for page in paginate(client, "list_functions"):
+        for page in pages or list_functions(args, args.region):
             for function in page["Functions"]:
-                yield function["FunctionArn"]
+                yield function["FunctionArn"], function
+
+
+def use_snapshot(args):
+    """
+    Returns True if loading the IAM snapshot pays off:
+    scanning whole regions or at least SNAPSHOT_MIN_FUNCTIONS ARNs from input
+    """
+    if args.function:
+        return False
+    if args.input:
+        with Path(args.input).open() as f:
+            return len([_ for _ in f.read().split("\n") if _.strip()]) >= SNAPSHOT_MIN_FUNCTIONS
+    return True
+
+
+def carry_forward(arn, config, args, writes):
+    """
+    Returns report saved by a previous run if Lambda function is unchanged
+    Returns None if function, its policies or event sources changed since
+    Security findings are scanned again, dependent resources may have changed
+    """
+    if args.sonarqube:
+        return None  # Code is downloaded from a fresh code location
+    report = load_report(args.output, arn.full)
+    if not report or report.get("fingerprint") != get_current_fingerprint(arn, config, args):
+        return None
+    if "kms" in report:
+        report["policy"]["kms"] = get_resource(report["kms"], args.profile, args.keys[0], args.keys[1]).policies
+    report["security"] = Scan(report, args).security
+    # Write permissions are resolved for the whole account on every run
+    report["writes"] = {"count": 0, "items": {}}
+    for w in writes.get_for_lambda(arn.full):
+        report["writes"]["count"] += 1
+        report["writes"]["items"].update(w)
+    return report
+
+
+def audit(arn_str, config, args, identity, writes):
+    """
+    Audits a single Lambda function, safe to call from worker threads
+    Returns Lambda report or None on failure
+    """
+    try:
+        arn = arnparse(arn_str)
+        if args.incremental and config:
+            report = carry_forward(arn, config, args, writes)
+            if report:
+                return report
+        lmbd = Lambda(arn.full, args, identity, config=config)
+        for w in writes.get_for_lambda(arn.full):
+            lmbd.set_writes(w)
+        return lmbd.report()
+    except Exception:
+        debug(arn_str)
+
+
+def get_reports(args, usage, identity, writes, listings=None):
+    """
+    Audits Lambda functions on a bounded pool of worker threads
+    Yields (ARN, report) tuples in listing order
+    """
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        pending = deque()
+        for region in usage.keys():
+            args.region = region
+            for arn_str, config in get_functions(args, (listings or {}).get(region)):
+                pending.append((arn_str, executor.submit(audit, arn_str, config, args, identity, writes)))
+                if len(pending) >= args.workers * 2:
+                    arn_str, future = pending.popleft()
+                    yield arn_str, future.result()
+        while pending:
+            arn_str, future = pending.popleft()
+            yield arn_str, future.result()
+
+
+def get_hooks(args):
+    """
+    Returns hooks installed on every botocore client:
+    persistent response cache, recorder or replayer of API calls
+    """
+    hooks = []
+    if args.replay:
+        hooks.append(Replayer(args.replay, args.replay_latency))
+    elif args.cache_mode != "off":
+        hooks.append(DiskCache(Path(args.cache_dir, "responses.sqlite"), args.cache_mode))
+    if args.record:
+        hooks.append(Recorder(args.record))
+    return hooks
+
+
+def audit_region(args, region, count, identity, writes, snapshot, path):
+    """
+    Audits Lambda functions of a single region in a worker process
+    Writes partial reports, statistics and log under path
+    Returns path
+    """
+    IAM.snapshot = snapshot
+    clients.configure(max_pool_connections=max(10, args.workers), hooks=get_hooks(args))
+    Path(path).mkdir(parents=True, exist_ok=True)
+    configure_log(path)
+    statistics = Statistics(path)
+    visibility = VisibilityReport(path)
+    for arn_str, report in get_reports(args, {region: count}, identity, writes):
+        if report:
+            statistics.parse(report)
+            visibility.save(report)
+    statistics.save()
+    visibility.save_index()
+    return path
+
+
+def get_partials(args, usage, identity, writes):
+    """
+    Audits regions on a pool of worker processes
+    Yields (region, partial output path) tuples in region order
+    """
+    with ProcessPoolExecutor(max_workers=args.processes) as executor:
+        futures = []
+        for region, count in usage.items():
+            path = Path(args.output, "partials", region)
+            futures.append(
+                (region, executor.submit(audit_region, args, region, count, identity, writes, IAM.snapshot, path))
+            )
+        for region, future in futures:
+            yield region, future.result()
+
+
+def merge(args, usage, identity, writes, statistics, visibility):
+    """
+    Merges partial outputs of worker processes into final output
+    """
+    count = 0
+    for region, path in get_partials(args, usage, identity, writes):
+        count += usage[region]
+        verbose(args, f"[ {count}/{sum(usage.values())} ] {region}")
+        statistics.merge(path)
+        visibility.merge(path)
+        append_log(path.joinpath("lambdaguard.log"))
+    rmtree(Path(args.output, "partials"), ignore_errors=True)
 
 
 def run(arguments=""):
@@ -120,16 +328,39 @@ def run(arguments=""):
     verbose(args, header, end="\n\n")
 
     if args.html:
-        HTMLReport(args.output).save()
+        HTMLReport(args.output).save(chunk_size=args.html_chunk_size)
         verbose(args, f"Generated {args.output}/report.html", end="\n\n")
         exit(0)
 
-    rmtree(args.output, ignore_errors=True)
+    args.workers = max(1, args.workers)
+    if args.sonarqube and args.workers > 1:
+        # SonarQube scans share a single download directory and working directory
+        verbose(args, "SonarQube enabled, falling back to a single worker", end="\n")
+        args.workers = 1
+    args.processes = max(1, args.processes)
+    if args.processes > 1 and (args.sonarqube or args.function or args.input):
+        # Regions are split between processes only when listing functions
+        verbose(args, "Auditing regions in a single process", end="\n")
+        args.processes = 1
+    hooks = get_hooks(args)
+    clients.configure(max_pool_connections=max(10, args.workers), hooks=hooks)
+    cache.clear()
+
+    if not args.incremental:
+        rmtree(args.output, ignore_errors=True)
     Path(args.output).mkdir(parents=True, exist_ok=True)
     configure_log(args.output)
-    usage = get_usage(args)
+    listings = {} if args.processes == 1 else None
+    skipped = []
+    usage = get_usage(args, listings, skipped)
+    if use_snapshot(args):
+        verbose(args, "Loading IAM snapshot")
+        IAM.load(args.profile, args.keys[0], args.keys[1])
+    else:
+        IAM.snapshot = None  # Roles and policies are fetched one by one
     verbose(args, "Loading identity")
     region = list(usage.keys())[0]
+    args.region = region  # Used by clients of global services
     sts_arn = f"arn:aws:sts:{region}"
     identity = STS(sts_arn, args.profile, args.keys[0], args.keys[1])
     if args.verbose:
@@ -144,23 +375,21 @@ def run(arguments=""):
     for region_count in usage.values():
         total_count += region_count
 
-    for region in usage.keys():
-        args.region = region
-        for arn_str in get_functions(args):
-            try:
-                arn = arnparse(arn_str)
-                counter = f'[ {statistics.statistics["lambdas"]+1}/{total_count} ] '
-                verbose(args, f"{counter}{arn.resource}")
-                lmbd = Lambda(arn.full, args, identity)
-                for w in writes.get_for_lambda(arn.full):
-                    lmbd.set_writes(w)
-                statistics.parse(lmbd.report())
-                visibility.save(lmbd.report())
-            except Exception:
-                debug(arn_str)
+    if args.processes > 1:
+        merge(args, usage, identity, writes, statistics, visibility)
+    else:
+        for count, (arn_str, report) in enumerate(get_reports(args, usage, identity, writes, listings), 1):
+            verbose(args, f"[ {count}/{total_count} ] {arn_str.split(':')[-1]}")
+            if report:
+                statistics.parse(report)
+                visibility.save(report)
+    if args.incremental:
+        visibility.prune()
+    statistics.save()
+    visibility.save_index()
 
-    SecurityReport(args.output).save()
-    HTMLReport(args.output).save()
+    SecurityReport(args.output).save(jsonl=args.jsonl)
+    HTMLReport(args.output).save(chunk_size=args.html_chunk_size)
 
     if args.verbose:
         print("\r" + " " * 100, end="\r")  # clear
@@ -171,6 +400,15 @@ def run(arguments=""):
         align("Layers", statistics.statistics["layers"])
         align("Runtimes", len(statistics.statistics["runtimes"]["items"]))
         align("Regions", len(statistics.statistics["regions"]["items"]))
+        if skipped:
+            align("Skipped", ", ".join(skipped), orange)
+        print("")
+        for _ in cache.caches:
+            align(f"{_.name} cache", f"{_.hits} hits, {_.misses} misses")
+        for _ in hooks:
+            if isinstance(_, DiskCache):
+                align("API cache", f"{_.hits} hits, {_.misses} misses")
+        align("Throttled", ratelimit.limiter.throttles)
         print("")
         align("Report", f"{args.output}/report.html")
         align("Log", f"{args.output}/lambdaguard.log")
@@ -0,0 +1,157 @@
+var LambdaGuard = (function () {
+  var ROW = 50, OVERSCAN = 10;
+  var chunks = {}, pending = {}, lists = {};
+
+  function load(id, callback) {
+    if (chunks[id]) {
+      return callback(chunks[id]);
+    }
+    if (pending[id]) {
+      return pending[id].push(callback);
+    }
+    pending[id] = [callback];
+    var script = document.createElement('script');
+    script.src = 'report/' + id + '.js';
+    document.body.appendChild(script);
+  }
+
+  function chunk(id, items) {
+    chunks[id] = items;
+    var callbacks = pending[id] || [];
+    delete pending[id];
+    callbacks.forEach(function (callback) { callback(items); });
+  }
+
+  function show(html) {
+    var body = $('#vlist-modal .modal-body');
+    body.html('<table class="table table-condensed"><tbody>' + html + '</tbody></table>');
+    body.find('[data-toggle]').removeAttr('data-toggle');
+    body.find('.collapse').addClass('in');
+    $('#vlist-modal').modal('show');
+  }
+
+  function List(name, manifest) {
+    var self = this;
+    this.name = name;
+    this.manifest = manifest;
+    this.el = document.getElementById(name + '-list');
+    this.spacer = this.el.firstElementChild;
+    this.el.addEventListener('scroll', function () { self.render(); });
+    this.filter(null);
+  }
+
+  List.prototype.filter = function (level) {
+    var start = 0;
+    this.chunks = [];
+    this.manifest.forEach(function (chunk) {
+      if (!level || chunk.level === level) {
+        this.chunks.push({id: chunk.id, start: start, count: chunk.count});
+        start += chunk.count;
+      }
+    }, this);
+    this.total = start;
+    this.rows = {};
+    $(this.el).find('.vlist-row').remove();
+    this.spacer.style.height = this.total * ROW + 'px';
+    this.el.scrollTop = 0;
+    this.render();
+  };
+
+  List.prototype.render = function () {
+    var self = this;
+    var first = Math.max(0, Math.floor(this.el.scrollTop / ROW) - OVERSCAN);
+    var last = Math.min(this.total, Math.ceil((this.el.scrollTop + this.el.clientHeight) / ROW) + OVERSCAN);
+    Object.keys(this.rows).forEach(function (position) {
+      if (position < first || position >= last) {
+        self.el.removeChild(self.rows[position]);
+        delete self.rows[position];
+      }
+    });
+    this.chunks.forEach(function (chunk) {
+      if (chunk.start >= last || chunk.start + chunk.count <= first) {
+        return;
+      }
+      var chunks = self.chunks;
+      load(chunk.id, function (items) {
+        if (self.chunks !== chunks) {
+          return;  // Filter changed while loading
+        }
+        var from = Math.max(first, chunk.start), to = Math.min(last, chunk.start + chunk.count);
+        for (var position = from; position < to; position++) {
+          if (!self.rows[position]) {
+            self.rows[position] = self.row(position, items[position - chunk.start]);
+          }
+        }
+      });
+    });
+  };
+
+  List.prototype.row = function (position, item) {
+    var row = document.createElement('div');
+    row.className = 'vlist-row';
+    row.style.top = position * ROW + 'px';
+    row.innerHTML = '<table class="table table-striped"><tbody>' + item.html + '</tbody></table>';
+    $(row).find('[data-toggle]').removeAttr('data-toggle');
+    $(row).find('a').on('click', function (event) {
+      event.preventDefault();
+      event.stopPropagation();
+      if (item.function !== null) {
+        lists.functions.open(item.function);
+      }
+    });
+    row.addEventListener('click', function () { show(item.html); });
+    this.el.appendChild(row);
+    return row;
+  };
+
+  List.prototype.open = function (position) {
+    this.filter(null);
+    this.el.scrollIntoView();
+    this.el.scrollTop = position * ROW;
+    this.chunks.forEach(function (chunk) {
+      if (position >= chunk.start && position < chunk.start + chunk.count) {
+        load(chunk.id, function (items) { show(items[position - chunk.start].html); });
+      }
+    });
+  };
+
+  function filters(list) {
+    var levels = ['all'];
+    list.manifest.forEach(function (chunk) {
+      if (chunk.level && levels.indexOf(chunk.level) < 0) {
+        levels.push(chunk.level);
+      }
+    });
+    if (levels.length < 2) {
+      return;
+    }
+    var group = $('#' + list.name + '-filter');
+    levels.forEach(function (level) {
+      $('<button type="button" class="btn btn-default btn-sm">' + level + '</button>')
+        .on('click', function () { list.filter(level === 'all' ? null : level); })
+        .appendTo(group);
+    });
+  }
+
+  function init(manifest) {
+    $('head').append(
+      '<style>' +
+      '#security table, #layers table, #functions table { table-layout: fixed; margin-bottom: 0; }' +
+      '.vlist { position: relative; height: 600px; overflow-y: auto; }' +
+      '.vlist-row { position: absolute; left: 0; right: 0; height: ' + ROW + 'px; overflow: hidden; cursor: pointer; }' +
+      '.vlist-row td { height: ' + ROW + 'px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }' +
+      '.vlist-row h4 { margin: 0; }' +
+      '</style>'
+    );
+    $('body').append(
+      '<div class="modal fade" id="vlist-modal" tabindex="-1"><div class="modal-dialog modal-lg">' +
+      '<div class="modal-content"><div class="modal-body"></div></div></div></div>'
+    );
+    Object.keys(manifest).forEach(function (name) {
+      lists[name] = new List(name, manifest[name]);
+      filters(lists[name]);
+    });
+  }
+
+  return {chunk: chunk, init: init};
+})();
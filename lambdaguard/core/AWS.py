@@ -12,9 +12,8 @@ under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
 CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
-import boto3
-
 from lambdaguard.utils.arnparse import arnparse
+from lambdaguard.utils.clients import get_client
 
 
 class AWS(object):
@@ -37,11 +36,17 @@ class AWS(object):
         # Additional service information
         self.info = ""
 
-        # AWS connection
-        session = boto3.Session(profile_name=self.profile)
-        self.client = session.client(
-            self.arn.service,
-            region_name=self.arn.region,
-            aws_access_key_id=access_key_id,
-            aws_secret_access_key=secret_access_key,
-        )
+        # AWS connection (shared between objects)
+        self.client = get_client(self.arn.service, self.arn.region, profile, access_key_id, secret_access_key)
+
+    def __getstate__(self):
+        """
+        Pickles object data without the live client (e.g. for worker processes)
+        """
+        state = self.__dict__.copy()
+        state["client"] = (self.client.meta.service_model.service_name, self.client.meta.region_name)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.client = get_client(*state["client"], self.profile, self.access_key_id, self.secret_access_key)
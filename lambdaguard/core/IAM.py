@@ -0,0 +1,109 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from lambdaguard.core.AWS import AWS
+from lambdaguard.utils.arnparse import arnparse
+from lambdaguard.utils.log import debug
+from lambdaguard.utils.paginator import paginate
+
+
+class IAM(AWS):
+    """
+    In-memory snapshot of the account's IAM roles, users, groups and
+    managed policies, fetched with get_account_authorization_details.
+    Shared by Role, ACL and LambdaWrite once loaded.
+    """
+
+    snapshot = None  # Loaded snapshot, None if not available
+
+    def __init__(self, profile=None, access_key_id=None, secret_access_key=None):
+        # Make sure we use IAM client
+        super().__init__("arn:aws:iam::", profile, access_key_id, secret_access_key)
+
+        self.roles = {}
+        self.users = {}
+        self.groups = {}
+        self.policies = {}
+
+        for page in self.get_pages():
+            self.index(page)
+
+    @classmethod
+    def load(cls, profile=None, access_key_id=None, secret_access_key=None):
+        """
+        Loads the account snapshot, falls back to per-entity calls on failure
+        """
+        try:
+            IAM.snapshot = cls(profile, access_key_id, secret_access_key)
+        except Exception:
+            debug("arn:aws:iam::")
+            IAM.snapshot = None
+        return IAM.snapshot
+
+    def get_pages(self):
+        """
+        Fetches account authorization details
+        """
+        yield from paginate(
+            self.client,
+            "get_account_authorization_details",
+            prefetch=True,
+            Filter=["User", "Role", "Group", "LocalManagedPolicy", "AWSManagedPolicy"],
+        )
+
+    def index(self, page):
+        """
+        Indexes entities by name and managed policies by ARN
+        Only the default version of each managed policy is kept
+        """
+        for role in page.get("RoleDetailList", []):
+            self.roles[role["RoleName"]] = role
+        for user in page.get("UserDetailList", []):
+            self.users[user["UserName"]] = user
+        for group in page.get("GroupDetailList", []):
+            self.groups[group["GroupName"]] = group
+        for policy in page.get("Policies", []):
+            policy["PolicyVersionList"] = [_ for _ in policy["PolicyVersionList"] if _["IsDefaultVersion"]]
+            self.policies[policy["Arn"]] = policy
+
+    def get_role(self, arn):
+        """
+        Returns role details for given role ARN, None if not in snapshot
+        """
+        role = self.roles.get(arnparse(arn).resource)
+        if role and role["Arn"] == arn:
+            return role
+        return None
+
+    def get_policy_version(self, arn):
+        """
+        Returns default version of a managed policy, None if not in snapshot
+        """
+        if arn in self.policies:
+            for version in self.policies[arn]["PolicyVersionList"]:
+                return version
+        return None
+
+    def get_local_policies(self):
+        """
+        Yields customer managed policies attached to at least one entity
+        """
+        for arn, policy in self.policies.items():
+            if arnparse(arn).account_id == "aws":
+                continue  # AWS managed
+            if not policy.get("AttachmentCount"):
+                continue  # Not attached
+            version = self.get_policy_version(arn)
+            if version:
+                yield arn, version
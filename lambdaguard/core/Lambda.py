@@ -13,13 +13,108 @@ CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
 import json
+from hashlib import md5
 
+from lambdaguard.__version__ import __version__
 from lambdaguard.core.AWS import AWS
-from lambdaguard.core.KMS import KMS
-from lambdaguard.core.Role import Role
-from lambdaguard.security.Scan import Scan
+from lambdaguard.core.Role import get_role
+from lambdaguard.security.Scan import Scan, get_resource
 from lambdaguard.utils.arnparse import arnparse
+from lambdaguard.utils.cache import Cache
+from lambdaguard.utils.clients import get_client
 from lambdaguard.utils.log import debug
+from lambdaguard.utils.paginator import paginate
+
+# Event source mappings by function ARN, per region
+mappings = Cache("Mappings")
+# Layer versions, shared between Lambda functions
+layers = Cache("Layers")
+# Configuration changed on every code or configuration update
+VERSION_KEYS = ["CodeSha256", "RevisionId", "LastModified"]
+
+
+def get_layer_version(client, arn):
+    """
+    Returns layer version details for given ARN, fetched once per run
+    """
+
+    def fetch():
+        layer = client.get_layer_version_by_arn(Arn=arn)
+        return {
+            "arn": layer["LayerVersionArn"],
+            "description": layer["Description"],
+            "codeURL": layer["Content"]["Location"],
+        }
+
+    return layers.get(arn, fetch)
+
+
+def list_event_source_mappings(client, **kwargs):
+    """
+    Yields all event source mappings, optionally filtered by FunctionName
+    """
+    for page in paginate(client, "list_event_source_mappings", **kwargs):
+        yield from page["EventSourceMappings"]
+
+
+def get_event_source_mappings(region, profile=None, access_key_id=None, secret_access_key=None):
+    """
+    Returns event source mappings in given region indexed by function ARN,
+    listed once per run instead of once per function
+    """
+
+    def index():
+        client = get_client("lambda", region, profile, access_key_id, secret_access_key)
+        index = {}
+        for mapping in list_event_source_mappings(client):
+            index.setdefault(mapping["FunctionArn"], []).append(mapping)
+        return index
+
+    return mappings.get((profile, access_key_id, secret_access_key, region), index)
+
+
+def get_function_policy(client, arn):
+    """
+    Returns Function (Resource-based) policy, empty if there is none
+    """
+    try:
+        policy = client.get_policy(FunctionName=arn.resource)
+        return json.loads(policy["Policy"])
+    except Exception:
+        debug(arn.full)
+        return {}
+
+
+def digest(data):
+    """
+    Returns MD5 hex digest of JSON serializable data
+    """
+    return md5(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def get_fingerprint(config, policy, role_policy, event_sources):
+    """
+    Returns fingerprint of what a Lambda report is built from:
+    LambdaGuard version, function version, function policy, role policies and event sources.
+    Dependent resources are not included, their findings are scanned again on every run.
+    """
+    fingerprint = {"lambdaguard": __version__}
+    fingerprint.update({_: config.get(_) for _ in VERSION_KEYS})
+    fingerprint["policy"] = digest(policy)
+    fingerprint["role"] = digest(role_policy)
+    fingerprint["mappings"] = digest(event_sources)
+    return fingerprint
+
+
+def get_current_fingerprint(arn, config, args):
+    """
+    Returns fingerprint of listed Lambda function without auditing it
+    """
+    profile, access_key_id, secret_access_key = args.profile, args.keys[0], args.keys[1]
+    client = get_client("lambda", arn.region, profile, access_key_id, secret_access_key)
+    role = get_role(config["Role"], profile, access_key_id, secret_access_key)
+    event_sources = get_event_source_mappings(arn.region, profile, access_key_id, secret_access_key)
+    return get_fingerprint(config, get_function_policy(client, arn), role.policy, event_sources.get(arn.full, []))
 
 
 class Lambda(AWS):
@@ -28,6 +123,7 @@ class Lambda(AWS):
 
         self.args = args[0]
         self.identity = args[1]
+        self.config = kwargs.get("config")  # Configuration from list_functions
         self.runtime = None
         self.handler = None
         self.layers = None
@@ -35,6 +131,7 @@ class Lambda(AWS):
         self.role = None
         self.kms = None
         self.codeURL = None
+        self.event_sources = []
         self.writes = {"count": 0, "items": {}}
         self.triggers = {"services": [], "items": {}}
         self.resources = {"services": [], "items": {}}
@@ -50,18 +147,18 @@ class Lambda(AWS):
         """
         Fetches Function (Resource-based) policy
         """
-        try:
-            policy = self.client.get_policy(FunctionName=self.arn.resource)
-            self.policy = json.loads(policy["Policy"])
-        except Exception:
-            debug(self.arn.full)
+        self.policy = get_function_policy(self.client, self.arn)
 
     def get_function(self):
         """
         Fetches Lambda function configuration
+        Listing configuration is reused unless the code location is needed (SonarQube)
         """
         try:
-            if self.identity.acl.allowed("lambda:GetFunction"):
+            if self.config and not self.args.sonarqube:
+                config = self.config
+                self.codeURL = ""
+            elif self.identity.acl.allowed("lambda:GetFunction"):
                 function = self.client.get_function(FunctionName=self.arn.resource)
                 config = function["Configuration"]
                 self.codeURL = function["Code"]["Location"]
@@ -71,17 +168,18 @@ class Lambda(AWS):
             else:
                 exit("\nMissing both lambda:GetFunction and lambda:GetFunctionConfiguration")
 
+            self.config = config
             self.runtime = config["Runtime"]
             self.handler = config["Handler"]
             self.description = config["Description"]
             if "KMSKeyArn" in config:
-                self.kms = KMS(
+                self.kms = get_resource(
                     config["KMSKeyArn"],
                     profile=self.profile,
                     access_key_id=self.access_key_id,
                     secret_access_key=self.secret_access_key,
                 )
-            self.role = Role(
+            self.role = get_role(
                 config["Role"],
                 profile=self.profile,
                 access_key_id=self.access_key_id,
@@ -90,14 +188,7 @@ class Lambda(AWS):
             self.layers = []
             if "Layers" in config:
                 for layer in config["Layers"]:
-                    layer = self.client.get_layer_version_by_arn(Arn=layer["Arn"])
-                    self.layers.append(
-                        {
-                            "arn": layer["LayerVersionArn"],
-                            "description": layer["Description"],
-                            "codeURL": layer["Content"]["Location"],
-                        }
-                    )
+                    self.layers.append(dict(get_layer_version(self.client, layer["Arn"])))
         except Exception:
             debug(self.arn.full)
 
@@ -107,7 +198,14 @@ class Lambda(AWS):
         """
         # Collect triggers from Event Sources
         try:
-            eventSource = self.client.list_event_source_mappings(FunctionName=self.arn.resource)["EventSourceMappings"]
+            if self.args.function:
+                # Single function, no need to list the whole region
+                eventSource = list(list_event_source_mappings(self.client, FunctionName=self.arn.resource))
+            else:
+                eventSource = get_event_source_mappings(
+                    self.arn.region, self.profile, self.access_key_id, self.secret_access_key
+                ).get(self.arn.full, [])
+            self.event_sources = eventSource
 
             for event in eventSource:
                 if event["State"] != "Enabled":
@@ -209,6 +307,7 @@ class Lambda(AWS):
             "triggers": self.triggers,
             "resources": self.resources,
             "security": self.security,
+            "fingerprint": get_fingerprint(self.config, self.policy, self.role.policy, self.event_sources),
         }
         if self.kms:
             ret["kms"] = self.kms.arn.full
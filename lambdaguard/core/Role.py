@@ -13,8 +13,20 @@ CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
 from lambdaguard.core.AWS import AWS
+from lambdaguard.core.IAM import IAM
+from lambdaguard.utils.cache import Cache
 from lambdaguard.utils.log import debug
 
+# Execution roles, shared between Lambda functions
+roles = Cache("Roles")
+
+
+def get_role(arn, profile=None, access_key_id=None, secret_access_key=None):
+    """
+    Returns Role for given ARN, policies are fetched once per run
+    """
+    return roles.get(arn, lambda: Role(arn, profile, access_key_id, secret_access_key))
+
 
 class Role(AWS):
     def __init__(self, arn, profile=None, access_key_id=None, secret_access_key=None):
@@ -28,6 +40,12 @@ class Role(AWS):
         """
         self.policy = {"roleName": self.arn.resource, "policies": []}
 
+        # Collect policies from the IAM snapshot
+        role = IAM.snapshot.get_role(self.arn.full) if IAM.snapshot else None
+        if role:
+            self.get_snapshot_policy(role)
+            return
+
         # Collect attached policies
         try:
             policies = self.client.list_attached_role_policies(RoleName=self.arn.resource)
@@ -56,3 +74,33 @@ class Role(AWS):
                 self.policy["policies"].append({"document": policy, "name": name, "type": "inline"})
         except Exception:
             debug(self.arn.full)
+
+    def get_snapshot_policy(self, role):
+        """
+        Collects attached and inline policies from the IAM snapshot
+        """
+        for attached in role["AttachedManagedPolicies"]:
+            version = IAM.snapshot.get_policy_version(attached["PolicyArn"])
+            if not version:
+                try:
+                    info = self.client.get_policy(PolicyArn=attached["PolicyArn"])
+                    version = self.client.get_policy_version(
+                        PolicyArn=attached["PolicyArn"],
+                        VersionId=info["Policy"]["DefaultVersionId"],
+                    )["PolicyVersion"]
+                except Exception:
+                    debug(self.arn.full)
+                    continue
+            self.policy["policies"].append(
+                {
+                    "document": version["Document"],
+                    "name": attached["PolicyName"],
+                    "arn": attached["PolicyArn"],
+                    "type": "managed",
+                }
+            )
+
+        for inline in role["RolePolicyList"]:
+            self.policy["policies"].append(
+                {"document": inline["PolicyDocument"], "name": inline["PolicyName"], "type": "inline"}
+            )
@@ -14,48 +14,52 @@ specific language governing permissions and limitations under the License.
 """
 
 
-import boto3
-
+from lambdaguard.core.IAM import IAM
+from lambdaguard.security.PolicyEvaluator import Statement, match_action
+from lambdaguard.utils.clients import get_client
 from lambdaguard.utils.iterator import iterate
 from lambdaguard.utils.paginator import paginate
 
-LAMBDA_WRITE_PERMISSIONS = [
-    x.lower()
-    for x in [
-        "*",
-        "lambda:*",
-        "lambda:Create*",
-        "lambda:Delete*",
-        "lambda:Invoke*",
-        "lambda:Publish*",
-        "lambda:Put*",
-        "lambda:Tag*",
-        "lambda:Untag*",
-        "lambda:Update*",
-        "lambda:CreateAlias",
-        "lambda:CreateFunction",
-        "lambda:DeleteAlias",
-        "lambda:DeleteEventSourceMapping",
-        "lambda:DeleteFunction",
-        "lambda:DeleteFunctionConcurrency",
-        "lambda:DeleteLayerVersion",
-        "lambda:InvokeAsync",
-        "lambda:InvokeFunction",
-        "lambda:PublishLayerVersion",
-        "lambda:PublishVersion",
-        "lambda:PutFunctionConcurrency",
-        "lambda:TagResource",
-        "lambda:UntagResource",
-        "lambda:UpdateAlias",
-        "lambda:UpdateEventSourceMapping",
-        "lambda:UpdateFunctionCode",
-        "lambda:UpdateFunctionConfiguration",
-    ]
+WRITE_PERMISSIONS = [
+    "*",
+    "lambda:*",
+    "lambda:Create*",
+    "lambda:Delete*",
+    "lambda:Invoke*",
+    "lambda:Publish*",
+    "lambda:Put*",
+    "lambda:Tag*",
+    "lambda:Untag*",
+    "lambda:Update*",
+    "lambda:CreateAlias",
+    "lambda:CreateFunction",
+    "lambda:DeleteAlias",
+    "lambda:DeleteEventSourceMapping",
+    "lambda:DeleteFunction",
+    "lambda:DeleteFunctionConcurrency",
+    "lambda:DeleteLayerVersion",
+    "lambda:InvokeAsync",
+    "lambda:InvokeFunction",
+    "lambda:PublishLayerVersion",
+    "lambda:PublishVersion",
+    "lambda:PutFunctionConcurrency",
+    "lambda:TagResource",
+    "lambda:UntagResource",
+    "lambda:UpdateAlias",
+    "lambda:UpdateEventSourceMapping",
+    "lambda:UpdateFunctionCode",
+    "lambda:UpdateFunctionConfiguration",
 ]
+LAMBDA_WRITE_PERMISSIONS = [x.lower() for x in WRITE_PERMISSIONS]
+# Write actions without wildcards, partially denied wildcard actions are expanded to these
+WRITE_ACTIONS = [x for x in WRITE_PERMISSIONS if "*" not in x]
 
 
 def is_write_action(action):
-    return action.lower() in LAMBDA_WRITE_PERMISSIONS
+    """
+    Check if action (or wildcard action) grants any Lambda write permission
+    """
+    return any(match_action(action, _) for _ in LAMBDA_WRITE_PERMISSIONS)
 
 
 class LambdaWrite:
@@ -79,13 +83,11 @@ class LambdaWrite:
                 self.writes[lambda_arn][policy_arn] = actions
 
     def get_attached_local_policies(self):
-        client = boto3.Session(
-            profile_name=self.args.profile,
-            aws_access_key_id=self.args.keys[0],
-            aws_secret_access_key=self.args.keys[1],
-            region_name=self.args.region,
-        ).client("iam")
-        pages = paginate(client, "list_policies", Scope="Local", OnlyAttached=True)
+        if IAM.snapshot:
+            yield from IAM.snapshot.get_local_policies()
+            return
+        client = get_client("iam", self.args.region, self.args.profile, self.args.keys[0], self.args.keys[1])
+        pages = paginate(client, "list_policies", prefetch=True, Scope="Local", OnlyAttached=True)
         for page in pages:
             for policy in page["Policies"]:
                 version = client.get_policy_version(PolicyArn=policy["Arn"], VersionId=policy["DefaultVersionId"])[
@@ -104,6 +106,9 @@ class LambdaWrite:
         else:
             statements = policy["Document"]["Statement"]
 
+        # Deny statements in the same policy take precedence
+        denies = [Statement(_) for _ in statements if isinstance(_, dict) and _.get("Effect") == "Deny"]
+
         for statement in statements:
             if "Effect" not in statement:
                 continue  # Unknown
@@ -123,7 +128,26 @@ class LambdaWrite:
 
             # Return all write Actions per Resource
             for arn in iterate(statement["Resource"]):
-                yield arn, write_actions
+                actions = self.get_allowed(write_actions, arn, denies)
+                if actions:
+                    yield arn, actions
+
+    def get_allowed(self, actions, resource, denies):
+        """
+        Returns write actions not denied on every resource matched by the resource pattern.
+        Partially denied wildcard actions are expanded to the remaining write actions.
+        """
+        ret = []
+        for action in actions:
+            if "*" in action or "?" in action:
+                expanded = [_ for _ in WRITE_ACTIONS if match_action(action, _)]
+            else:
+                expanded = [action]
+            allowed = [_ for _ in expanded if not any(deny.covers(_, resource) for deny in denies)]
+            if len(allowed) == len(expanded):
+                allowed = [action]
+            ret.extend(_ for _ in allowed if _ not in ret)
+        return ret
 
     def get_for_lambda(self, arn):
         for w_arn, w_actions in self.writes.items():
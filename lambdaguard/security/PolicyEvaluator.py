@@ -0,0 +1,141 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import re
+from functools import lru_cache
+
+from lambdaguard.utils.iterator import iterate
+
+ALLOWED = "allowed"
+EXPLICIT_DENY = "explicitDeny"
+IMPLICIT_DENY = "implicitDeny"
+
+
+@lru_cache(maxsize=4096)
+def compile_patterns(patterns, ignore_case=False, covering=False):
+    """
+    Compiles IAM wildcard patterns (* and ?) into a single regex matcher
+    Example: compile_patterns(("s3:Get*", "sqs:*"), ignore_case=True)
+
+    With covering=True the matcher is applied to another pattern, which is matched
+    only if the patterns match every string it matches: a * in the other pattern
+    is matched by * alone, not by ? or a literal character.
+    """
+    any_char = "[^*]" if covering else "."
+    regex = "|".join(
+        "".join(".*" if c == "*" else any_char if c == "?" else re.escape(c) for c in pattern) for pattern in patterns
+    )
+    flags = re.DOTALL | (re.IGNORECASE if ignore_case else 0)
+    return re.compile(f"^(?:{regex})$", flags).match
+
+
+def match_action(pattern, action):
+    """
+    Actions are matched case-insensitively
+    """
+    return compile_patterns((pattern,), True)(action) is not None
+
+
+def match_resource(pattern, resource):
+    """
+    Resources are matched case-sensitively
+    """
+    return compile_patterns((pattern,))(resource) is not None
+
+
+class Statement:
+    """
+    Policy statement with compiled Action and Resource matchers
+    """
+
+    def __init__(self, statement):
+        self.effect = statement.get("Effect")
+        self.conditional = bool(statement.get("Condition"))
+
+        self.negate_action = "NotAction" in statement
+        actions = tuple(iterate(statement.get("NotAction" if self.negate_action else "Action", [])))
+        self.actions = compile_patterns(actions, True) if actions else None
+
+        self.negate_resource = "NotResource" in statement
+        resources = tuple(iterate(statement.get("NotResource" if self.negate_resource else "Resource", [])))
+        self.any_resource = "*" in resources
+        self.resources = compile_patterns(resources) if resources else None
+        self.covered = compile_patterns(resources, covering=True) if resources else None
+
+    def matches(self, action, resource="*"):
+        if self.conditional:
+            return False  # Conditions are not evaluated without request context
+        if self.actions is None:
+            return False
+        if bool(self.actions(action)) == self.negate_action:
+            return False
+        if self.resources is None:
+            return True  # Resource is implied, like in resource-based policies
+        if resource == "*":
+            # Unspecified resource, like the IAM policy simulator default
+            return not (self.negate_resource and self.any_resource)
+        return bool(self.resources(resource)) != self.negate_resource
+
+    def covers(self, action, resource):
+        """
+        Check if statement matches action on every resource matched by the resource pattern
+        Example: Deny on arn:aws:lambda:*:*:function:* covers arn:aws:lambda:eu-west-1:0:function:a*
+        but Deny on arn:aws:lambda:eu-west-1:0:function:a does not cover *
+        and Deny on arn:aws:lambda:eu-west-1:0:function:a? does not cover arn:aws:lambda:eu-west-1:0:function:a*
+        """
+        if self.conditional or self.actions is None:
+            return False
+        if self.resources is None or self.negate_resource:
+            return False
+        if bool(self.actions(action)) == self.negate_action:
+            return False
+        return self.any_resource or bool(self.covered(resource))
+
+
+class PolicyEvaluator:
+    """
+    Offline evaluation of IAM policy documents.
+    An explicit Deny overrides any Allow, actions that are
+    not allowed are implicitly denied.
+    Statements with a Condition never match, like the IAM policy
+    simulator when no context keys are provided.
+    """
+
+    def __init__(self, documents):
+        self.statements = []
+        for document in documents:
+            statements = document.get("Statement", []) if isinstance(document, dict) else []
+            if isinstance(statements, dict):
+                statements = [statements]
+            for statement in statements:
+                if isinstance(statement, dict):
+                    self.statements.append(Statement(statement))
+
+    def evaluate(self, action, resource="*"):
+        """
+        Returns the simulator decision for given action and resource:
+        allowed, explicitDeny or implicitDeny
+        """
+        decision = IMPLICIT_DENY
+        for statement in self.statements:
+            if not statement.matches(action, resource):
+                continue
+            if statement.effect == "Deny":
+                return EXPLICIT_DENY
+            if statement.effect == "Allow":
+                decision = ALLOWED
+        return decision
+
+    def allowed(self, action, resource="*"):
+        return self.evaluate(action, resource) == ALLOWED
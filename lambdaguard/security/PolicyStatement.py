@@ -12,8 +12,16 @@ under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
 CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import json
+from hashlib import md5
+
+from lambdaguard.security.PolicyEvaluator import PolicyEvaluator
 from lambdaguard.security.PrivilegeEscalation import PrivilegeEscalation
 from lambdaguard.utils.arnparse import arnparse
+from lambdaguard.utils.cache import Cache
+
+# Findings of audited statements, shared between roles and functions
+audits = Cache("Policies")
 
 
 class PolicyStatement:
@@ -22,8 +30,25 @@ class PolicyStatement:
         self.policy = policy
         self.vulnerabilities = []
         self.recommendations = []
+        self.evaluator = None
+
+    def get_key(self):
+        """
+        Returns a canonical hash of the statement and the context its findings depend on
+        """
+        context = [self.policy["name"], self.policy["type"]] if self.policy else None
+        data = json.dumps([self.statement, context], sort_keys=True, default=str)
+        return md5(data.encode("utf-8")).hexdigest()
 
     def audit(self):
+        """
+        Yields findings of the statement.
+        Identical statements in the same context are audited once per run.
+        """
+        for _ in audits.get(self.get_key(), lambda: list(self.audit_statement())):
+            yield dict(_)
+
+    def audit_statement(self):
         if type(self.statement) != dict:
             return None
         if self.statement["Effect"] != "Allow":
@@ -145,6 +170,15 @@ class PolicyStatement:
         # Privilege Escalation via IAM permissions
         yield from PrivilegeEscalation(self.get("Action")).audit()
 
+    def allows(self, action, resource="*"):
+        """
+        Check if statement allows action on resource, wildcards included
+        Example: allows('iam:PassRole')
+        """
+        if not self.evaluator:
+            self.evaluator = PolicyEvaluator([{"Statement": [self.statement]}])
+        return self.evaluator.allowed(action, resource)
+
     def get(self, idx):
         """
         Returns a list of items from given index in statement
@@ -14,36 +14,57 @@ specific language governing permissions and limitations under the License.
 """
 import json
 from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lambdaguard.visibility.Report import load_index
+
+LEVELS = ["high", "medium", "low", "info"]
 
 
 class SecurityReport:
     def __init__(self, path):
         self.path = Path(path)
 
-    def save(self):
-        if not self.path.joinpath("index.json").exists():
+    def save(self, jsonl=False):
+        """
+        Saves findings of all reports in security.json, ordered by level
+        Reports are read once, findings are spooled to disk per level,
+        so memory use does not grow with the number of findings.
+        Optionally, also saves findings as JSON lines in security.jsonl
+        """
+        if not (self.path.joinpath("index.json").exists() or self.path.joinpath("index.jsonl").exists()):
             return
 
-        OUT = []
-
-        index = json.loads(self.path.joinpath("index.json").read_text())
-
-        for sort in ["high", "medium", "low", "info"]:
-            for idx, lmbd_arn in index.items():
+        with TemporaryDirectory(dir=str(self.path)) as tmp:
+            spools = {level: Path(tmp, level).open("w+") for level in LEVELS}
+            for idx, lmbd_arn in load_index(self.path).items():
                 with self.path.joinpath("reports", f"{idx}.json").open() as f:
                     report = json.loads(f.read())
-                    if "items" in report["security"]:
-                        for _ in report["security"]["items"]:
-                            if _["level"] == sort:
-                                OUT.append(
-                                    {
-                                        "index": idx,
-                                        "lambda": lmbd_arn,
-                                        "where": _["where"],
-                                        "level": _["level"],
-                                        "text": _["text"],
-                                    }
-                                )
-
-        with self.path.joinpath("security.json").open("w") as f:
-            f.write(json.dumps(OUT, indent=4))
+                for _ in report["security"].get("items", []):
+                    if _["level"] not in spools:
+                        continue
+                    finding = {
+                        "index": idx,
+                        "lambda": lmbd_arn,
+                        "where": _["where"],
+                        "level": _["level"],
+                        "text": _["text"],
+                    }
+                    spools[_["level"]].write(json.dumps(finding) + "\n")
+
+            with self.path.joinpath("security.json").open("w") as out:
+                jsonl_out = self.path.joinpath("security.jsonl").open("w") if jsonl else None
+                count = 0
+                for level in LEVELS:
+                    spools[level].seek(0)
+                    for line in spools[level]:
+                        if jsonl_out:
+                            jsonl_out.write(line)
+                        # Same layout as json.dumps(findings, indent=4)
+                        finding = json.dumps(json.loads(line), indent=4).replace("\n", "\n    ")
+                        out.write(("[\n    " if not count else ",\n    ") + finding)
+                        count += 1
+                    spools[level].close()
+                out.write("\n]" if count else "[]")
+                if jsonl_out:
+                    jsonl_out.close()
@@ -22,10 +22,48 @@ from lambdaguard.security.AccessControlList import AccessControlList
 from lambdaguard.security.Encryption import Encryption
 from lambdaguard.security.PolicyStatement import PolicyStatement
 from lambdaguard.security.Public import Public
+from lambdaguard.security.Report import LEVELS
 from lambdaguard.security.SonarQube import SonarQube
 from lambdaguard.utils.arnparse import arnparse
+from lambdaguard.utils.cache import Cache
 from lambdaguard.utils.log import debug
 
+SERVICES = {
+    "apigateway": APIGateway,
+    "dynamodb": DynamoDB,
+    "kms": KMS,
+    "s3": S3,
+    "sns": SNS,
+    "sqs": SQS,
+}
+
+# Dependent resources and their findings, shared between Lambda functions
+resources = Cache("Resources")
+findings = Cache("Findings")
+
+
+def get_key(item):
+    """
+    Returns a hashable key of a finding, equal for equal findings
+    """
+    return tuple(sorted(item.items()))
+
+
+def get_resource(arn, profile=None, access_key_id=None, secret_access_key=None):
+    """
+    Returns the service object for given ARN, fetched once per run
+    """
+    arn = arnparse(arn)
+    return resources.get(
+        arn.full,
+        lambda: SERVICES[arn.service](
+            arn.full,
+            profile=profile,
+            access_key_id=access_key_id,
+            secret_access_key=secret_access_key,
+        ),
+    )
+
 
 class Scan:
     def __init__(self, report, *args, **kwargs):
@@ -35,6 +73,7 @@ class Scan:
         self.access_key_id = args[0].keys[0]
         self.secret_access_key = args[0].keys[1]
         self.security = {"count": {}, "items": []}
+        self.seen = set()  # keys of tracked findings
 
         self.item = None  # item currently scanned
 
@@ -58,8 +97,10 @@ class Scan:
         if self.item:
             item["where"] += f"\n\n{self.item.info}"
 
-        if item in self.security["items"]:
+        key = get_key(item)
+        if key in self.seen:
             return  # Avoid duplicates
+        self.seen.add(key)
 
         level = item["level"]
         if level in self.security["count"]:
@@ -101,25 +142,8 @@ class Scan:
 
         # Audit KMS
         if "kms" in self.report:
-            self.item = KMS(
-                self.report["kms"],
-                profile=self.profile,
-                access_key_id=self.access_key_id,
-                secret_access_key=self.secret_access_key,
-            )
-            if not self.item.rotation:
-                self.track(
-                    self.report["kms"],
-                    {
-                        "level": "medium",
-                        "text": (
-                            "Automatic rotation of key material is disabled\n"
-                            "https://docs.aws.amazon.com/kms/latest/developerguide/rotate-keys.html"
-                        ),
-                    },
-                )
-            for _, policy in self.item.policies.items():
-                self.audit_policy_statements(self.item.arn, policy)
+            self.item = self.get_resource(self.report["kms"])
+            self.track_cached(("kms", self.item.arn.full), self.audit_kms)
 
         # Audit Resources
         if "logs" not in self.report["resources"]["services"]:
@@ -144,66 +168,13 @@ class Scan:
                 continue
 
             self.item = None
-            if arn.service == "s3":
-                if arn.resource_type:  # S3 object path
-                    continue
-                self.item = S3(
-                    arn.full,
-                    profile=self.profile,
-                    access_key_id=self.access_key_id,
-                    secret_access_key=self.secret_access_key,
-                )
-                for _ in AccessControlList(self.item.acl).audit():
-                    self.track(arn.full, _)
-                for _ in Encryption(self.item).audit():
-                    self.track(arn.full, _)
-            elif arn.service == "sqs":
-                self.item = SQS(
-                    arn.full,
-                    profile=self.profile,
-                    access_key_id=self.access_key_id,
-                    secret_access_key=self.secret_access_key,
-                )
-            elif arn.service == "sns":
-                self.item = SNS(
-                    arn.full,
-                    profile=self.profile,
-                    access_key_id=self.access_key_id,
-                    secret_access_key=self.secret_access_key,
-                )
-            elif arn.service == "apigateway":
-                self.item = APIGateway(
-                    arn.full,
-                    profile=self.profile,
-                    access_key_id=self.access_key_id,
-                    secret_access_key=self.secret_access_key,
-                )
-            elif arn.service == "dynamodb":
-                self.item = DynamoDB(
-                    arn.full,
-                    profile=self.profile,
-                    access_key_id=self.access_key_id,
-                    secret_access_key=self.secret_access_key,
-                )
-            elif arn.service == "kms":
-                self.item = KMS(
-                    arn.full,
-                    profile=self.profile,
-                    access_key_id=self.access_key_id,
-                    secret_access_key=self.secret_access_key,
-                )
-
-            if self.item:
-                if type(self.item) == KMS:
-                    # Audit KMS Policies
-                    for _, policy in self.item.policies.items():
-                        self.audit_policy_statements(self.item.arn, policy)
-                else:
-                    # Audit item Resource-based Policy
-                    self.audit_policy_statements(self.item.arn, self.item.policy)
-                    # If policy is missing, then the service is public
-                    for _ in Public(self.item).audit():
-                        self.track(arn.full, _)
+            if arn.service not in SERVICES:
+                continue
+            if arn.service == "s3" and arn.resource_type:  # S3 object path
+                continue
+
+            self.item = self.get_resource(arn.full)
+            self.track_cached(("resource", arn.full), self.audit_resource)
 
         # SonarQube
         if self.args.sonarqube:
@@ -212,19 +183,67 @@ class Scan:
                 self.scan_sonarqube(layer["codeURL"], self.report["runtime"])
 
         # Sort findings by level
-        sorted_items = []
-        for sort in ["high", "medium", "low", "info"]:
-            for item in self.security["items"]:
-                if item["level"] == sort:
-                    if item not in sorted_items:
-                        sorted_items.append(item)
-        self.security["items"] = sorted_items
+        buckets = {level: [] for level in LEVELS}
+        for item in self.security["items"]:
+            if item["level"] in buckets:
+                buckets[item["level"]].append(item)
+        self.security["items"] = [item for level in LEVELS for item in buckets[level]]
+
+    def get_resource(self, arn):
+        return get_resource(arn, self.profile, self.access_key_id, self.secret_access_key)
+
+    def track_cached(self, key, audit):
+        """
+        Tracks findings of the item currently scanned.
+        Items are audited once per run, findings are reused by all functions.
+        """
+        item = self.item
+        for arn, _ in findings.get(key, lambda: list(audit(item))):
+            self.track(arn, dict(_))
+
+    def audit_kms(self, item):
+        """
+        Audits KMS key used by the function
+        Yields (ARN, finding) tuples
+        """
+        if not item.rotation:
+            yield item.arn.full, {
+                "level": "medium",
+                "text": (
+                    "Automatic rotation of key material is disabled\n"
+                    "https://docs.aws.amazon.com/kms/latest/developerguide/rotate-keys.html"
+                ),
+            }
+        for _, policy in item.policies.items():
+            yield from self.audit_policy_statements(item.arn, policy)
+
+    def audit_resource(self, item):
+        """
+        Audits a trigger or resource used by the function
+        Yields (ARN, finding) tuples
+        """
+        if item.arn.service == "s3":
+            for _ in AccessControlList(item.acl).audit():
+                yield item.arn.full, _
+            for _ in Encryption(item).audit():
+                yield item.arn.full, _
+
+        if type(item) == KMS:
+            # Audit KMS Policies
+            for _, policy in item.policies.items():
+                yield from self.audit_policy_statements(item.arn, policy)
+        else:
+            # Audit item Resource-based Policy
+            yield from self.audit_policy_statements(item.arn, item.policy)
+            # If policy is missing, then the service is public
+            for _ in Public(item).audit():
+                yield item.arn.full, _
 
     def audit_policy_statements(self, arn, policy):
         if "Statement" in policy:
             for statement in policy["Statement"]:
                 for _ in PolicyStatement(statement).audit():
-                    self.track(arn.full, _)
+                    yield arn.full, _
 
     def scan_sonarqube(self, codeURL, runtime):
         for _ in self.sonarqube.scan(self.report["name"], codeURL, runtime):
@@ -15,8 +15,39 @@ specific language governing permissions and limitations under the License.
 import json
 
 from lambdaguard.core.AWS import AWS
+from lambdaguard.core.IAM import IAM
+from lambdaguard.security.PolicyEvaluator import PolicyEvaluator
 from lambdaguard.utils.arnparse import arnparse
 from lambdaguard.utils.log import debug
+from lambdaguard.utils.paginator import paginate
+
+# Actions the scan may need, resolved once per identity
+ACTIONS = [
+    "apigateway:GET",
+    "dynamodb:DescribeTable",
+    "iam:GetAccountAuthorizationDetails",
+    "iam:GetPolicy",
+    "iam:GetPolicyVersion",
+    "iam:GetRolePolicy",
+    "iam:ListAttachedRolePolicies",
+    "iam:ListPolicies",
+    "iam:ListRolePolicies",
+    "kms:GetKeyPolicy",
+    "kms:GetKeyRotationStatus",
+    "kms:ListKeyPolicies",
+    "lambda:GetAccountSettings",
+    "lambda:GetFunction",
+    "lambda:GetFunctionConfiguration",
+    "lambda:GetLayerVersion",
+    "lambda:GetPolicy",
+    "lambda:ListEventSourceMappings",
+    "lambda:ListFunctions",
+    "s3:GetBucketAcl",
+    "s3:GetBucketPolicy",
+    "s3:GetEncryptionConfiguration",
+    "sns:GetTopicAttributes",
+    "sqs:GetQueueAttributes",
+]
 
 
 class ACL(AWS):
@@ -25,14 +56,18 @@ class ACL(AWS):
         super().__init__("arn:aws:iam::", profile, access_key_id, secret_access_key)
         self.arn = arnparse(arn)
         self.policy_documents = []
-        self.permissions = []
+        self.permissions = {}  # Simulated decisions by action
 
         if self.arn.resource_type == "user":
             self.get_user_permissions()
         elif self.arn.resource_type == "assumed-role":
             self.get_role_permissions()
 
+        self.resolve(ACTIONS)
+
     def get_user_permissions(self):
+        if IAM.snapshot and self.arn.resource in IAM.snapshot.users:
+            return self.get_snapshot_permissions(IAM.snapshot.users[self.arn.resource])
         try:
             policies = self.client.list_policies_granting_service_access(
                 Arn=self.arn.full,
@@ -55,6 +90,8 @@ class ACL(AWS):
             debug(self.arn.full)
 
     def get_role_permissions(self):
+        if IAM.snapshot and self.arn.resource in IAM.snapshot.roles:
+            return self.get_snapshot_permissions(IAM.snapshot.roles[self.arn.resource])
         try:
             policies = self.client.list_attached_role_policies(RoleName=self.arn.resource)["AttachedPolicies"]
             for policy in policies:
@@ -62,11 +99,33 @@ class ACL(AWS):
         except Exception:
             debug(self.arn.full)
 
+    def get_snapshot_permissions(self, entity):
+        """
+        Collects managed and inline policies of a user or role,
+        including policies of the user's groups, from the IAM snapshot
+        """
+        entities = [entity]
+        for group in entity.get("GroupList", []):
+            if group in IAM.snapshot.groups:
+                entities.append(IAM.snapshot.groups[group])
+        try:
+            for entity in entities:
+                for policy in entity["AttachedManagedPolicies"]:
+                    self.policy_documents.append(self.get_policy_documents(policy))
+                for idx in ["UserPolicyList", "RolePolicyList", "GroupPolicyList"]:
+                    for policy in entity.get(idx, []):
+                        self.policy_documents.append(policy["PolicyDocument"])
+        except Exception:
+            debug(self.arn.full)
+
     def get_policy_documents(self, policy):
         history = {}
 
         if "PolicyType" not in policy or policy["PolicyType"] == "MANAGED":
             policy_arn = policy["PolicyArn"]
+            version = IAM.snapshot.get_policy_version(policy_arn) if IAM.snapshot else None
+            if version:
+                return version["Document"]
             if policy_arn not in history:
                 policy_version = self.client.get_policy(PolicyArn=policy_arn)["Policy"]["DefaultVersionId"]
                 policy_document = self.client.get_policy_version(PolicyArn=policy_arn, VersionId=policy_version)[
@@ -81,15 +140,44 @@ class ACL(AWS):
             ]
             return policy_document
 
-    def allowed(self, action):
-        if action in self.permissions:
-            return True  # Previously checked
+    def resolve(self, actions):
+        """
+        Simulates given actions in a single batched call
+        Falls back to offline evaluation if the simulator is not available
+        """
+        actions = [_ for _ in actions if _ not in self.permissions]
+        try:
+            self.simulate(actions)
+        except Exception:
+            debug(self.arn.full)
+            if self.policy_documents:
+                self.evaluate(actions)
+
+    def simulate(self, actions):
+        """
+        Simulates policy documents for given actions
+        Caches both allowed and denied decisions
+        """
+        if not actions:
+            return
         policy_input = [json.dumps(_) for _ in self.policy_documents]
-        simulation_results = self.client.simulate_custom_policy(PolicyInputList=policy_input, ActionNames=[action])[
-            "EvaluationResults"
-        ]
-        for result in simulation_results:
-            if result["EvalDecision"] == "allowed":
-                self.permissions.append(action)
-                return True  # Allowed
-        return False  # Not allowed
+        for page in paginate(self.client, "simulate_custom_policy", PolicyInputList=policy_input, ActionNames=actions):
+            for result in page["EvaluationResults"]:
+                self.permissions[result["EvalActionName"]] = result["EvalDecision"] == "allowed"
+
+    def evaluate(self, actions):
+        """
+        Evaluates policy documents for given actions offline
+        """
+        evaluator = PolicyEvaluator(self.policy_documents)
+        for action in actions:
+            self.permissions[action] = evaluator.allowed(action)
+
+    def allowed(self, action):
+        if action not in self.permissions:
+            # Not resolved in advance
+            if self.policy_documents:
+                self.resolve([action])
+            else:
+                self.simulate([action])
+        return self.permissions.get(action, False)
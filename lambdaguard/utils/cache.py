@@ -0,0 +1,76 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from threading import Lock
+
+# All caches, cleared between runs
+caches = []
+
+
+class Cache:
+    """
+    Thread-safe in-memory cache for data shared between Lambda functions.
+    Each key is created once, concurrent callers wait for the first one.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = Lock()
+        self.items = {}
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+        caches.append(self)
+
+    def get(self, key, factory):
+        """
+        Returns cached value for key, calling factory() on first use
+        """
+        with self.lock:
+            if key in self.items:
+                self.hits += 1
+                return self.items[key]
+            lock = self.pending.setdefault(key, Lock())
+
+        with lock:
+            with self.lock:
+                if key in self.items:
+                    self.hits += 1
+                    return self.items[key]
+            try:
+                value = factory()
+                with self.lock:
+                    self.items[key] = value
+                    self.misses += 1
+                return value
+            finally:
+                with self.lock:
+                    self.pending.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self.items)
+
+
+def clear():
+    """
+    Clears all caches
+    """
+    for cache in caches:
+        cache.clear()
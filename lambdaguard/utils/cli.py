@@ -16,6 +16,7 @@ import argparse
 from os import environ
 
 from lambdaguard.__version__ import __version__
+from lambdaguard.utils.diskcache import MODES
 
 environ["PYTHONIOENCODING"] = "UTF-8"
 
@@ -67,6 +68,36 @@ def parse_args(arguments=""):
     )
     argsParser.add_argument("-r", "--region", default="all", help="AWS region")
     argsParser.add_argument("-sq", "--sonarqube", help="SonarQube config file")
+    argsParser.add_argument(
+        "-w", "--workers", type=int, default=1, help="Number of functions audited concurrently (default: 1)"
+    )
+    argsParser.add_argument(
+        "-P", "--processes", type=int, default=1, help="Number of regions audited in parallel processes (default: 1)"
+    )
+    argsParser.add_argument(
+        "-I", "--incremental", action="store_true", help="Keep previous output and audit changed functions only"
+    )
+    argsParser.add_argument(
+        "--cache-mode",
+        choices=MODES,
+        default="off",
+        help="Persistent AWS response cache: read only, write (read and update), refresh (update only)",
+    )
+    argsParser.add_argument("--cache-dir", default="lambdaguard_cache", help="Persistent cache directory")
+    replayArgs = argsParser.add_mutually_exclusive_group()
+    replayArgs.add_argument("--record", metavar="DIR", help="Record AWS API calls under directory")
+    replayArgs.add_argument("--replay", metavar="DIR", help="Replay recorded AWS API calls, without network access")
+    argsParser.add_argument(
+        "--replay-latency", type=float, default=0, metavar="SECONDS", help="Latency of replayed API calls (default: 0)"
+    )
+    argsParser.add_argument("--jsonl", action="store_true", help="Also save security findings as JSON lines")
+    argsParser.add_argument(
+        "--html-chunk-size",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Split the HTML report into data chunks of N items, loaded on demand (default: off)",
+    )
     argsParser.add_argument("-v", "--verbose", action="store_true", help="Verbose output to terminal")
     argsParser.add_argument(
         "-V",
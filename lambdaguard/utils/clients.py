@@ -0,0 +1,81 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from threading import Lock
+
+import boto3
+from botocore.config import Config
+
+from lambdaguard.utils.ratelimit import limiter
+
+lock = Lock()
+sessions = {}
+clients = {}
+settings = {"max_pool_connections": 10, "hooks": []}
+# Client-side adaptive retries back off on throttling errors
+RETRIES = {"mode": "adaptive", "max_attempts": 10}
+
+
+def configure(max_pool_connections=10, hooks=()):
+    """
+    Configures botocore clients created from now on.
+    Size max_pool_connections to the number of worker threads,
+    so every thread can reuse a pooled connection.
+    Hooks (e.g. DiskCache, Recorder) are installed on every client.
+    """
+    with lock:
+        settings["max_pool_connections"] = max_pool_connections
+        settings["hooks"] = list(hooks)
+        clients.clear()
+    limiter.clear()
+
+
+def get_session(profile=None, access_key_id=None, secret_access_key=None):
+    """
+    Returns a shared boto3 Session for given profile and keys
+    """
+    key = (profile, access_key_id, secret_access_key)
+    with lock:
+        if key not in sessions:
+            sessions[key] = boto3.Session(
+                profile_name=profile,
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+            )
+        return sessions[key]
+
+
+def get_client(service, region=None, profile=None, access_key_id=None, secret_access_key=None):
+    """
+    Returns a shared botocore client for given service and region.
+    Clients are thread-safe and keep their connection pool between calls.
+    Requests are rate limited per service, region and API.
+    """
+    key = (profile, access_key_id, secret_access_key, service, region)
+    with lock:
+        if key in clients:
+            return clients[key]
+    session = get_session(profile, access_key_id, secret_access_key)
+    with lock:
+        # Session is not thread-safe, clients are created one at a time
+        if key not in clients:
+            clients[key] = session.client(
+                service,
+                region_name=region,
+                config=Config(max_pool_connections=settings["max_pool_connections"], retries=RETRIES),
+            )
+            limiter.install(clients[key])
+            for hook in settings["hooks"]:
+                hook.install(clients[key], (profile, access_key_id))
+        return clients[key]
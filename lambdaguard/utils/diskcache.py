@@ -0,0 +1,164 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import pickle
+import sqlite3
+from hashlib import md5
+from os import getpid
+from pathlib import Path
+from threading import Lock
+from time import time
+
+from botocore.awsrequest import AWSResponse
+
+MODES = ["off", "read", "write", "refresh"]
+
+# Seconds responses stay valid, by service (services not listed are never cached)
+TTLS = {
+    "apigateway": 3600,
+    "dynamodb": 3600,
+    "iam": 3600,
+    "kms": 3600,
+    "s3": 3600,
+    "sns": 3600,
+    "sqs": 3600,
+}
+
+# Bytes of cached responses kept before evicting least recently used
+MAX_SIZE = 512 * 1024 * 1024
+
+
+class DiskCache:
+    """
+    Persistent SQLite cache of AWS API responses, shared between runs
+    Modes:
+        read:       Uses cached responses, never stores new ones
+        write:      Uses cached responses, stores missing and expired ones
+        refresh:    Ignores cached responses, stores all new ones
+    Only successful responses and missing resources (404) are cached.
+    """
+
+    def __init__(self, path, mode="write", ttls=TTLS, max_size=MAX_SIZE):
+        self.path = Path(path)
+        self.mode = mode
+        self.ttls = ttls
+        self.max_size = max_size
+        self.lock = Lock()
+        self.pid = None
+        self.db = None
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            self.connect()
+
+    def connect(self):
+        """
+        Returns SQLite connection, reopened in forked worker processes
+        """
+        if self.pid != getpid():
+            self.db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")  # Concurrent worker processes
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, service TEXT, status INTEGER, response BLOB, "
+                "size INTEGER, created REAL, accessed REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self.size = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            self.pid = getpid()
+        return self.db
+
+    def get(self, key, service):
+        """
+        Returns cached (status, response) or None if missing or expired
+        """
+        with self.lock:
+            db = self.connect()
+            row = db.execute("SELECT status, response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if not row or row[2] + self.ttls.get(service, 0) < time():
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time(), key))
+            self.hits += 1
+        return row[0], pickle.loads(row[1])
+
+    def put(self, key, service, status, response):
+        data = pickle.dumps(response)
+        now = time()
+        with self.lock:
+            db = self.connect()
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, service, status, data, len(data), now, now),
+            )
+            self.size += len(data)
+            if self.size > self.max_size:
+                self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used responses until cache fits in max_size
+        """
+        db = self.connect()
+        self.size = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        keys = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            if self.size <= self.max_size:
+                break
+            keys.append((key,))
+            self.size -= size
+        db.executemany("DELETE FROM responses WHERE key = ?", keys)
+
+    def __len__(self):
+        with self.lock:
+            return self.connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def install(self, client, scope=None):
+        """
+        Registers caching of API calls made by botocore client
+        Responses are keyed by scope (e.g. profile), region, operation and parameters
+        """
+        service = client.meta.service_model.service_name
+        if self.mode == "off" or service not in self.ttls:
+            return
+        service_id = client.meta.service_model.service_id.hyphenize()
+        region = client.meta.region_name
+
+        def before_parameter_build(params, model, context, **kwargs):
+            key = json.dumps([scope, region, service, model.name, params], sort_keys=True, default=str)
+            context["cache_key"] = md5(key.encode("utf-8")).hexdigest()
+
+        def before_call(context, **kwargs):
+            if self.mode == "refresh" or "cache_key" not in context:
+                return None
+            cached = self.get(context["cache_key"], service)
+            if not cached:
+                return None
+            context["cached"] = True
+            return AWSResponse("", cached[0], {}, None), cached[1]
+
+        def after_call(http_response, parsed, context, **kwargs):
+            if self.mode == "read" or "cache_key" not in context or context.get("cached"):
+                return
+            if http_response.status_code < 300 or http_response.status_code == 404:
+                self.put(context["cache_key"], service, http_response.status_code, parsed)
+
+        client.meta.events.register(f"before-parameter-build.{service_id}", before_parameter_build)
+        client.meta.events.register(f"before-call.{service_id}", before_call)
+        # Stored before botocore handlers post-process (e.g. decode IAM policies)
+        client.meta.events.register_first(f"after-call.{service_id}", after_call)
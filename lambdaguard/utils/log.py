@@ -14,6 +14,7 @@ specific language governing permissions and limitations under the License.
 """
 import logging
 import logging.config
+import shutil
 import traceback
 from pathlib import Path
 
@@ -48,6 +49,25 @@ def configure_log(path=""):
     )
 
 
+def append_log(path):
+    """
+    Appends a log file, e.g. of a worker process, to the current log.
+    Written through the open log handler, so later messages do not overwrite it.
+    """
+    for handler in logging.getLogger().handlers:
+        if not isinstance(handler, logging.FileHandler):
+            continue
+        handler.acquire()
+        try:
+            if handler.stream is None:
+                handler.stream = handler._open()
+            with Path(path).open(encoding="utf-8") as f:
+                shutil.copyfileobj(f, handler.stream)
+            handler.stream.flush()
+        finally:
+            handler.release()
+
+
 def debug(arn=""):
     # Get exception name and description
     trace = traceback.format_exc().strip()
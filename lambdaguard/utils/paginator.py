@@ -12,20 +12,63 @@ under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
 CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+from queue import Queue
+from threading import Thread
 
+# Maximum page size supported by each AWS paginator
+PAGE_SIZES = {
+    "get_account_authorization_details": 1000,
+    "list_event_source_mappings": 100,
+    "list_functions": 50,
+    "list_layer_versions": 50,
+    "list_layers": 50,
+    "list_policies": 1000,
+    "simulate_custom_policy": 1000,
+}
 
-def paginate(client, paginator, **kwargs):
+
+def paginate(client, paginator, page_size=None, prefetch=False, **kwargs):
     """
     Returns pages for given AWS paginator client and type.
+    Pages are requested at the service maximum size unless page_size is set.
+    With prefetch, the next page is fetched in the background
+    while the caller processes the current one.
     Example: iam client and "list_policies" paginator
     """
-    marker = None
-    while True:
-        pages = client.get_paginator(paginator).paginate(
-            **kwargs, PaginationConfig={"MaxItems": 10, "PageSize": 10, "StartingToken": marker}
-        )
-        for page in pages:
-            yield page
-        if "NextMarker" not in page:
-            break
-        marker = page["NextMarker"]
+    page_size = page_size or PAGE_SIZES.get(paginator)
+    config = {"PageSize": page_size} if page_size else {}
+    pages = client.get_paginator(paginator).paginate(**kwargs, PaginationConfig=config)
+    if prefetch:
+        return background(pages)
+    return iter(pages)
+
+
+def background(iterable, size=1):
+    """
+    Consumes iterable in a background thread, starting immediately.
+    Returns a generator over the items, keeping up to size items ready.
+    Exceptions raised while iterating are re-raised to the caller.
+    """
+    queue = Queue(maxsize=size)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                queue.put((item, None))
+        except Exception as e:
+            queue.put((done, e))
+            return
+        queue.put((done, None))
+
+    def consume():
+        while True:
+            item, error = queue.get()
+            if error:
+                raise error
+            if item is done:
+                return
+            yield item
+
+    Thread(target=produce, daemon=True).start()
+    return consume()
@@ -0,0 +1,135 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+from threading import Lock
+from time import monotonic, sleep
+
+# Error codes returned by AWS services when requests are throttled
+THROTTLING_CODES = [
+    "BandwidthLimitExceeded",
+    "LimitExceededException",
+    "PriorRequestNotComplete",
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "TooManyRequestsException",
+]
+
+# Initial requests per second for each API, by service
+RATES = {
+    "iam": 10,
+    "lambda": 15,
+    "sts": 10,
+}
+DEFAULT_RATE = 50
+MIN_RATE = 0.5
+MAX_RATE = 1000
+
+
+class TokenBucket:
+    """
+    Token bucket with an adaptive fill rate (AIMD).
+    The rate is halved when a request is throttled
+    and grows back by one request per second on success.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE):
+        self.lock = Lock()
+        self.rate = rate
+        self.tokens = rate
+        self.timestamp = monotonic()
+        self.throttles = 0
+
+    def acquire(self):
+        """
+        Takes a token, waiting until one is available
+        """
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.timestamp) * self.rate)
+            self.timestamp = now
+            self.tokens -= 1  # Reserved, may go negative
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            sleep(wait)
+
+    def throttled(self):
+        with self.lock:
+            self.throttles += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = min(self.tokens, 0)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(MAX_RATE, self.rate + 1 / self.rate)
+
+
+class RateLimiter:
+    """
+    Token buckets per (service, region, API), shared by all clients
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.buckets = {}
+
+    def get_bucket(self, service, region, api):
+        key = (service, region, api)
+        with self.lock:
+            if key not in self.buckets:
+                self.buckets[key] = TokenBucket(RATES.get(service, DEFAULT_RATE))
+            return self.buckets[key]
+
+    def install(self, client):
+        """
+        Registers rate limiting on every attempt made by botocore client
+        """
+        service = client.meta.service_model.service_name
+        region = client.meta.region_name
+
+        def before_send(event_name, **kwargs):
+            self.get_bucket(service, region, event_name.split(".")[-1]).acquire()
+
+        def needs_retry(event_name, response=None, **kwargs):
+            if not response:
+                return None  # Connection error
+            bucket = self.get_bucket(service, region, event_name.split(".")[-1])
+            if is_throttled(response[1]):
+                bucket.throttled()
+            elif response[0].status_code < 300:
+                bucket.succeeded()
+            return None  # Retries are left to botocore
+
+        client.meta.events.register("before-send", before_send)
+        client.meta.events.register("needs-retry", needs_retry)
+
+    @property
+    def throttles(self):
+        with self.lock:
+            return sum(_.throttles for _ in self.buckets.values())
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+def is_throttled(parsed):
+    return parsed.get("Error", {}).get("Code") in THROTTLING_CODES
+
+
+limiter = RateLimiter()
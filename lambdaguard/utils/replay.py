@@ -0,0 +1,96 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import pickle
+from hashlib import md5
+from os import getpid
+from pathlib import Path
+from threading import get_ident
+from time import sleep
+
+from botocore.awsrequest import AWSResponse
+
+
+def get_path(path, service, operation, region, params):
+    """
+    Returns path of a recorded API call
+    """
+    key = json.dumps([region, params], sort_keys=True, default=str)
+    return Path(path, service, operation, f"{md5(key.encode('utf-8')).hexdigest()}.pickle")
+
+
+class Recorder:
+    """
+    Records every API call made by botocore clients under path
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def install(self, client, scope=None):
+        service = client.meta.service_model.service_name
+        service_id = client.meta.service_model.service_id.hyphenize()
+        region = client.meta.region_name
+
+        def before_parameter_build(params, model, context, **kwargs):
+            context["record_path"] = get_path(self.path, service, model.name, region, params)
+
+        def after_call(http_response, parsed, context, **kwargs):
+            if "record_path" not in context:
+                return
+            path = context["record_path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written atomically, identical calls may be recorded concurrently
+            tmp = path.with_name(f"{path.name}.{getpid()}.{get_ident()}.tmp")
+            tmp.write_bytes(pickle.dumps((http_response.status_code, parsed)))
+            tmp.replace(path)
+
+        client.meta.events.register(f"before-parameter-build.{service_id}", before_parameter_build)
+        # Recorded before botocore handlers post-process (e.g. decode IAM policies)
+        client.meta.events.register_first(f"after-call.{service_id}", after_call)
+
+
+class Replayer:
+    """
+    Serves API calls recorded under path, without network access
+    Optionally waits latency seconds per call to behave like the real API
+    Calls that were not recorded fail with a ReplayNotFound error
+    """
+
+    def __init__(self, path, latency=0):
+        self.path = Path(path)
+        self.latency = latency
+
+    def install(self, client, scope=None):
+        service = client.meta.service_model.service_name
+        service_id = client.meta.service_model.service_id.hyphenize()
+        region = client.meta.region_name
+
+        def before_parameter_build(params, model, context, **kwargs):
+            context["replay_path"] = get_path(self.path, service, model.name, region, params)
+
+        def before_call(model, context, **kwargs):
+            if self.latency:
+                sleep(self.latency)
+            path = context["replay_path"]
+            if not path.exists():
+                error = {"Code": "ReplayNotFound", "Message": f"{service}.{model.name} was not recorded"}
+                return AWSResponse("", 404, {}, None), {"Error": error, "ResponseMetadata": {"HTTPStatusCode": 404}}
+            status, parsed = pickle.loads(path.read_bytes())
+            return AWSResponse("", status, {}, None), parsed
+
+        client.meta.events.register(f"before-parameter-build.{service_id}", before_parameter_build)
+        # Replayed before any other handler, e.g. cached responses
+        client.meta.events.register_first(f"before-call.{service_id}", before_call)
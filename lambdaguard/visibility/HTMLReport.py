@@ -13,41 +13,128 @@ CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
 import json
+import re
+import shutil
 from base64 import b64encode
 from pathlib import Path
+from tempfile import TemporaryFile
+
+from lambdaguard.visibility.Report import load_index
+
+PLACEHOLDER = re.compile(r"(\{[a-z-]+\})")
+CHUNK_SIZE = 1024 * 1024
+
+
+def iter_json(path, chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of a JSON list file one at a time
+    """
+    decoder = json.JSONDecoder()
+    separators = re.compile(r"[\s,]*")
+    with Path(path).open() as f:
+        buf = f.read(chunk_size).lstrip()
+        if not buf.startswith("["):
+            return
+        pos, eof = 1, False
+        while True:
+            pos = separators.match(buf, pos).end()
+            if buf.startswith("]", pos):
+                return
+            try:
+                item, pos = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            yield item
+
+
+class Chunks:
+    """
+    Writes items to <path>/<section>-<n>.js data chunks of at most size items each.
+    Chunks are JavaScript so that the report can load them from disk without a web server.
+    """
+
+    def __init__(self, path, section, size):
+        self.path = Path(path)
+        self.section = section
+        self.size = size
+        self.manifest = []
+        self.count = 0
+        self.f = None
+
+    def append(self, item, level=None):
+        """
+        Appends item, starting a new chunk when full or on a new level. Returns item position.
+        """
+        chunk = self.manifest[-1] if self.manifest else None
+        if chunk is None or chunk["count"] == self.size or chunk.get("level") != level:
+            self.close()
+            chunk = {"id": f"{self.section}-{len(self.manifest)}", "count": 0}
+            if level:
+                chunk["level"] = level
+            self.manifest.append(chunk)
+            self.f = self.path.joinpath(f"{chunk['id']}.js").open("w")
+            self.f.write(f'LambdaGuard.chunk("{chunk["id"]}", [')
+        else:
+            self.f.write(",\n")
+        self.f.write(json.dumps(item))
+        chunk["count"] += 1
+        self.count += 1
+        return self.count - 1
+
+    def close(self):
+        if self.f:
+            self.f.write("]);\n")
+            self.f.close()
+            self.f = None
 
 
 class HTMLReport:
     def __init__(self, path):
         self.path = Path(path)
+        self.assets_path = Path(__file__).parents[1].joinpath("assets")
 
     def txt2html(self, text):
         html = text.split("\n")
         return "<br>".join(html)
 
-    def save(self):
+    def get_asset(self, name):
+        with self.assets_path.joinpath(name).open() as f:
+            return f.read()
+
+    def write_template(self, f, template, sections):
         """
-        Generates an HTML report
+        Writes template to f, streaming each {placeholder} from its section writer
         """
-        assets_path = Path(__file__).parents[1].joinpath("assets")
+        for part in PLACEHOLDER.split(template):
+            if part in sections:
+                sections[part](f)
+            else:
+                f.write(part)
 
-        with assets_path.joinpath("index.html").open() as f:
-            report_html = f.read()
+    def write_asset(self, name):
+        def writer(f):
+            with self.assets_path.joinpath(name).open() as asset:
+                shutil.copyfileobj(asset, f)
 
-        with assets_path.joinpath("logo.png").open("rb") as f:
-            logo = b64encode(f.read()).decode("ascii")
-            report_html = report_html.replace("{logo}", str(logo))
+        return writer
 
-        # ===================================================== Statistics
-        if not self.path.joinpath("statistics.json").exists():
-            return
-        with self.path.joinpath("statistics.json").open() as f:
-            stats_json = json.loads(f.read())
+    def write_logo(self, f):
+        with self.assets_path.joinpath("logo.png").open("rb") as logo:
+            f.write(b64encode(logo.read()).decode("ascii"))
 
+    def get_statistics(self, stats_json):
+        """
+        Renders the statistics table and charts
+        """
         exclude_info = stats_json["lambdas"] > 1  # Exclude info level
 
-        stats_table = assets_path.joinpath("stats.html").open().read()
-        stats_table_item = assets_path.joinpath("statsitem.html").open().read()
+        stats_table = self.get_asset("stats.html")
+        stats_table_item = self.get_asset("statsitem.html")
         for title, data in stats_json.items():
             if title in ["lambdas", "regions", "layers"]:
                 continue
@@ -67,13 +154,7 @@ class HTMLReport:
         stats_table = stats_table.replace("{lambdas_count}", str(stats_json["lambdas"]))
         stats_table = stats_table.replace("{layers_count}", str(stats_json["layers"]))
 
-        with assets_path.joinpath("highcharts.js").open() as f:
-            report_html = report_html.replace("{highcharts}", f.read())
-        with assets_path.joinpath("highcharts-theme.js").open() as f:
-            report_html = report_html.replace("{highcharts-theme}", f.read())
-
-        with assets_path.joinpath("stats.js").open() as f:
-            stats_template = f.read()
+        stats_template = self.get_asset("stats.js")
 
         stats_js = []
         for title, data in stats_json.items():
@@ -94,21 +175,15 @@ class HTMLReport:
             chart = chart.replace("{data}", json.dumps(series))
             stats_js.append(chart)
 
-        report_html = report_html.replace("{statistics}", stats_table)
-        report_html = report_html.replace("{highcharts-data}", "\n".join(stats_js))
-
-        stats_table = None
-        stats_js = None
+        return stats_table, "\n".join(stats_js)
 
-        # ===================================================== Security
-        with self.path.joinpath("security.json").open() as f:
-            vulns_json = json.loads(f.read())
-
-        with assets_path.joinpath("vuln.html").open() as f:
-            vuln_html_template = f.read()
+    def render_vulns(self, exclude_info):
+        """
+        Yields (finding, html) for every finding in security.json
+        """
+        vuln_html_template = self.get_asset("vuln.html")
 
-        vulns_html = ""
-        for _ in vulns_json:
+        for _ in iter_json(self.path.joinpath("security.json")):
             if exclude_info and _["level"] == "info":
                 continue
             html = vuln_html_template
@@ -117,36 +192,29 @@ class HTMLReport:
             html = html.replace("{text}", self.txt2html(_["text"]))
             html = html.replace("{where}", self.txt2html(_["where"]))
             html = html.replace("{lambda}", _["lambda"])
-            vulns_html += f"{html}\n"
-
-        with assets_path.joinpath("vulnlist.html").open() as f:
-            vulnlist_html = f.read()
-
-        vulnlist_html = vulnlist_html.replace("{items}", vulns_html)
-
-        report_html = report_html.replace("{security}", vulnlist_html)
-
-        vulns_json = None
-        vulns_html = None
-        vulnlist_html = None
+            yield _, html
 
-        # ===================================================== Functions & Layers
-        all_layers = []
-
-        with self.path.joinpath("index.json").open() as f:
-            index = json.loads(f.read())
+    def write_security(self, f, exclude_info):
+        """
+        Streams security.json findings into the findings table
+        """
 
-        with assets_path.joinpath("func.html").open() as f:
-            func_html_template = f.read()
+        def write_items(f):
+            for _, html in self.render_vulns(exclude_info):
+                f.write(f"{html}\n")
 
-        with assets_path.joinpath("funcvuln.html").open() as f:
-            vuln_html_template = f.read()
+        self.write_template(f, self.get_asset("vulnlist.html"), {"{items}": write_items})
 
-        funcs_html = ""
+    def render_functions(self, exclude_info, all_layers):
+        """
+        Yields (index, html) for every function report, collecting unique layers in all_layers
+        """
+        func_html_template = self.get_asset("func.html")
+        vuln_html_template = self.get_asset("funcvuln.html")
 
-        for idx in index.keys():
-            with self.path.joinpath("reports", f"{idx}.json").open() as f:
-                func = json.loads(f.read())
+        for idx in load_index(self.path).keys():
+            with self.path.joinpath("reports", f"{idx}.json").open() as report:
+                func = json.load(report)
 
             funcvuln_html = []
 
@@ -162,8 +230,7 @@ class HTMLReport:
             for layer in func["layers"]:
                 layers.append(f"{layer['arn']} ({layer['description']})")
                 layer.update({"runtime": func["runtime"]})
-                if layer not in all_layers:
-                    all_layers.append(layer)
+                all_layers.setdefault(json.dumps(layer, sort_keys=True), layer)
 
             html = func_html_template
             html = html.replace("{index}", idx)
@@ -191,40 +258,134 @@ class HTMLReport:
                 html = html.replace("{kms}", "")
                 html = html.replace("{kms_policies}", "{}")
 
-            funcs_html += f"{html}\n"
-
-        with assets_path.joinpath("funclist.html").open() as f:
-            funclist_html = f.read()
-
-        funclist_html = funclist_html.replace("{items}", funcs_html)
-
-        report_html = report_html.replace("{functions}", funclist_html)
+            yield idx, html
 
-        funcs_html = None
-        funclist_html = None
-
-        with assets_path.joinpath("layer.html").open() as f:
-            layer_html_template = f.read()
+    def write_functions(self, f, exclude_info):
+        """
+        Streams every function report to f, returns the unique layers seen
+        """
+        all_layers = {}
+        for _, html in self.render_functions(exclude_info, all_layers):
+            f.write(f"{html}\n")
+        return list(all_layers.values())
 
-        layer_html = ""
+    def render_layers(self, all_layers):
+        """
+        Yields html for every unique layer
+        """
+        layer_html_template = self.get_asset("layer.html")
 
         for layer in all_layers:
             html = layer_html_template.replace("{arn}", layer["arn"])
             html = html.replace("{description}", layer["description"])
             html = html.replace("{runtime}", layer["runtime"])
-            layer_html += f"{html}\n"
-
-        with assets_path.joinpath("layerlist.html").open() as f:
-            layerlist_html = f.read()
+            yield html
 
-        layerlist_html = layerlist_html.replace("{items}", layer_html)
+    def write_layers(self, f, all_layers):
+        def write_items(f):
+            for html in self.render_layers(all_layers):
+                f.write(f"{html}\n")
 
-        report_html = report_html.replace("{layers}", layerlist_html)
+        self.write_template(f, self.get_asset("layerlist.html"), {"{items}": write_items})
 
-        layer_html = None
-        layerlist_html = None
+    def write_chunked(self, name, chunks):
+        """
+        Writes a virtualized list container for a chunked section
+        """
+        header = self.get_asset(f"{name}list.html").replace("{items}", "")
+        return lambda f: f.write(
+            self.get_asset("vlist.html").replace("{section}", chunks.section).replace("{header}", header)
+        )
 
-        # ===================================================== HTML
+    def save_chunks(self, stats_table, stats_js, exclude_info, chunk_size):
+        """
+        Generates a shell report.html, with functions, layers and findings in report/*.js data chunks
+        loaded on demand by the page
+        """
+        chunks_path = self.path.joinpath("report")
+        if chunks_path.exists():
+            shutil.rmtree(chunks_path)
+        chunks_path.mkdir()
+
+        all_layers = {}
+        positions = {}
+        functions = Chunks(chunks_path, "functions", chunk_size)
+        for idx, html in self.render_functions(exclude_info, all_layers):
+            positions[idx] = functions.append({"html": html})
+        functions.close()
+
+        layers = Chunks(chunks_path, "layers", chunk_size)
+        for html in self.render_layers(all_layers.values()):
+            layers.append({"html": html})
+        layers.close()
+        all_layers = None
+
+        security = Chunks(chunks_path, "security", chunk_size)
+        for _, html in self.render_vulns(exclude_info):
+            security.append({"html": html, "function": positions.get(_["index"])}, level=_["level"])
+        security.close()
+
+        manifest = json.dumps(
+            {"security": security.manifest, "layers": layers.manifest, "functions": functions.manifest}
+        )
+
+        def write_data(f):
+            f.write(f"{stats_js}\n")
+            self.write_asset("vlist.js")(f)
+            f.write(f"LambdaGuard.init({manifest});")
+
+        sections = {
+            "{logo}": self.write_logo,
+            "{statistics}": lambda f: f.write(stats_table),
+            "{security}": self.write_chunked("vuln", security),
+            "{layers}": self.write_chunked("layer", layers),
+            "{functions}": self.write_chunked("func", functions),
+            "{highcharts}": self.write_asset("highcharts.js"),
+            "{highcharts-theme}": self.write_asset("highcharts-theme.js"),
+            "{highcharts-data}": write_data,
+        }
 
         with self.path.joinpath("report.html").open("w") as f:
-            f.write(report_html)
+            self.write_template(f, self.get_asset("index.html"), sections)
+
+    def save(self, chunk_size=0):
+        """
+        Generates an HTML report, streaming it to disk section by section.
+        With chunk_size, functions, layers and findings are paged into separate data chunks.
+        """
+        if not self.path.joinpath("statistics.json").exists():
+            return
+        with self.path.joinpath("statistics.json").open() as f:
+            stats_json = json.load(f)
+
+        exclude_info = stats_json["lambdas"] > 1  # Exclude info level
+        stats_table, stats_js = self.get_statistics(stats_json)
+
+        if chunk_size:
+            self.save_chunks(stats_table, stats_js, exclude_info, chunk_size)
+            return
+
+        # Layers are listed before functions but collected from the function
+        # reports, so functions are rendered once to a spool file first
+        with TemporaryFile("w+", dir=self.path) as funcs:
+            all_layers = self.write_functions(funcs, exclude_info)
+
+            def write_funcs(f):
+                funcs.seek(0)
+                shutil.copyfileobj(funcs, f)
+
+            sections = {
+                "{logo}": self.write_logo,
+                "{statistics}": lambda f: f.write(stats_table),
+                "{security}": lambda f: self.write_security(f, exclude_info),
+                "{layers}": lambda f: self.write_layers(f, all_layers),
+                "{functions}": lambda f: self.write_template(
+                    f, self.get_asset("funclist.html"), {"{items}": write_funcs}
+                ),
+                "{highcharts}": self.write_asset("highcharts.js"),
+                "{highcharts-theme}": self.write_asset("highcharts-theme.js"),
+                "{highcharts-data}": lambda f: f.write(stats_js),
+            }
+
+            with self.path.joinpath("report.html").open("w") as f:
+                self.write_template(f, self.get_asset("index.html"), sections)
@@ -17,17 +17,54 @@ from hashlib import md5
 from pathlib import Path
 
 
+def load_index(path):
+    """
+    Returns index of saved reports, including the journal of an unfinished run
+    """
+    path = Path(path)
+    index = {}
+    if path.joinpath("index.json").exists():
+        index.update(json.loads(path.joinpath("index.json").read_text()))
+    if path.joinpath("index.jsonl").exists():
+        for line in path.joinpath("index.jsonl").read_text().splitlines():
+            try:
+                idx, arn = json.loads(line)
+            except ValueError:
+                break  # Last line cut short by a crash
+            index[idx] = arn
+    return index
+
+
+def get_idx(arn):
+    idx = md5()
+    idx.update(arn.encode("utf-8"))
+    return idx.hexdigest()
+
+
+def load_report(path, arn):
+    """
+    Returns report saved under path by a previous run, None if there is none
+    """
+    path = Path(path).joinpath("reports", f"{get_idx(arn)}.json")
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
 class VisibilityReport:
     def __init__(self, path):
         self.path = Path(path)
         self.index = {}
+        # Append-only journal of index entries, compacted into index.json by save_index()
+        self.journal = None
 
         self.path.joinpath("reports").mkdir(parents=True, exist_ok=True)
 
+    def get_idx(self, arn):
+        return get_idx(arn)
+
     def save(self, report, verbose=False):
-        idx = md5()
-        idx.update(report["arn"].encode("utf-8"))
-        idx = idx.hexdigest()
+        idx = self.get_idx(report["arn"])
 
         self.index[idx] = report["arn"]
 
@@ -37,8 +74,53 @@ class VisibilityReport:
         if verbose:
             print(report)
 
-        self.save_index()
+        self.append(idx, self.index[idx])
+
+    def append(self, idx, arn):
+        """
+        Appends an index entry to the journal, one line per report.
+        The first entry truncates a journal left by a previous run.
+        """
+        if not self.journal:
+            self.journal = self.path.joinpath("index.jsonl").open("a")
+            self.journal.truncate(0)
+        self.journal.write(json.dumps([idx, arn]) + "\n")
+        self.journal.flush()
 
     def save_index(self):
-        with self.path.joinpath("index.json").open("w") as f:
+        """
+        Compacts the journal into index.json
+        """
+        tmp = self.path.joinpath("index.json.tmp")
+        with tmp.open("w") as f:
             f.write(json.dumps(self.index, indent=4))
+        tmp.replace(self.path.joinpath("index.json"))
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+        if self.path.joinpath("index.jsonl").exists():
+            self.path.joinpath("index.jsonl").unlink()
+
+    def load(self, arn):
+        """
+        Returns report saved by a previous run, None if there is none
+        """
+        return load_report(self.path, arn)
+
+    def prune(self):
+        """
+        Removes reports saved by a previous run that are no longer indexed
+        """
+        for path in self.path.joinpath("reports").glob("*.json"):
+            if path.stem not in self.index:
+                path.unlink()
+
+    def merge(self, path):
+        """
+        Moves reports from a partial VisibilityReport into this one
+        """
+        path = Path(path)
+        for idx, arn in load_index(path).items():
+            path.joinpath("reports", f"{idx}.json").replace(self.path.joinpath("reports", f"{idx}.json"))
+            self.index[idx] = arn
+            self.append(idx, arn)
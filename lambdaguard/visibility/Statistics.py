@@ -13,22 +13,31 @@ CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
 import json
+from collections import Counter
 from pathlib import Path
+from time import monotonic
 
 from lambdaguard.utils.arnparse import arnparse
 
 
 class Statistics:
-    def __init__(self, path):
+    """
+    Statistics are accumulated in memory and saved every interval seconds
+    (never if None) while parsing, call save() once all reports are parsed.
+    """
+
+    def __init__(self, path, interval=60):
         self.path = Path(path)
+        self.interval = interval
+        self.saved = monotonic()
         self.statistics = {
             "lambdas": 0,
             "layers": 0,
-            "regions": {"count": 0, "items": {}},
-            "runtimes": {"count": 0, "items": {}},
-            "triggers": {"count": 0, "items": {}},
-            "resources": {"count": 0, "items": {}},
-            "security": {"count": 0, "items": {}},
+            "regions": {"count": 0, "items": Counter()},
+            "runtimes": {"count": 0, "items": Counter()},
+            "triggers": {"count": 0, "items": Counter()},
+            "resources": {"count": 0, "items": Counter()},
+            "security": {"count": 0, "items": Counter()},
         }
 
     def track(self, idx, value, count=1):
@@ -42,11 +51,7 @@ class Statistics:
         @param  value   Value
         """
         self.statistics[idx]["count"] += count
-
-        if value not in self.statistics[idx]["items"]:
-            self.statistics[idx]["items"][value] = count
-        else:
-            self.statistics[idx]["items"][value] += count
+        self.statistics[idx]["items"][value] += count
 
     def parse(self, report, verbose=False):
         """
@@ -66,11 +71,30 @@ class Statistics:
             for level, level_count in report["security"]["count"].items():
                 self.track("security", level, level_count)
 
-        self.save(verbose=verbose)
+        if verbose or (self.interval is not None and monotonic() - self.saved >= self.interval):
+            self.save(verbose=verbose)
+
+    def merge(self, path):
+        """
+        Adds statistics from a partial Statistics saved under path
+        """
+        statistics = json.loads(Path(path).joinpath("statistics.json").read_text())
+        for idx, value in statistics.items():
+            if isinstance(value, dict):
+                for item, count in value["items"].items():
+                    self.track(idx, item, count)
+            else:
+                self.statistics[idx] += value
 
     def save(self, verbose=False):
+        """
+        Saves statistics atomically, readers never see a partial file
+        """
         stats = json.dumps(self.statistics, indent=4)
-        with self.path.joinpath("statistics.json").open("w") as f:
+        tmp = self.path.joinpath("statistics.json.tmp")
+        with tmp.open("w") as f:
             f.write(stats)
+        tmp.replace(self.path.joinpath("statistics.json"))
+        self.saved = monotonic()
         if verbose:
             print(stats)
@@ -0,0 +1,332 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+from collections import Counter
+from hashlib import md5
+from random import Random
+from threading import Lock
+from time import sleep
+from urllib.parse import quote
+
+from botocore.awsrequest import AWSResponse
+
+ACCOUNT_ID = "123456789012"
+SCANNER = f"arn:aws:iam::{ACCOUNT_ID}:user/scanner"
+READ_ONLY = "arn:aws:iam::aws:policy/ReadOnlyAccess"
+LAMBDA_WRITE = f"arn:aws:iam::{ACCOUNT_ID}:policy/lambda-write"
+ACTIONS = {"s3": "s3:GetObject", "sqs": "sqs:SendMessage", "sns": "sns:Publish", "dynamodb": "dynamodb:GetItem"}
+
+
+def document(*statements):
+    return {"Version": "2012-10-17", "Statement": list(statements)}
+
+
+def digest(name):
+    return int(md5(name.encode("utf-8")).hexdigest(), 16)
+
+
+def unlucky(name, odds):
+    """
+    Deterministically picks about 1 in odds resources to be misconfigured
+    """
+    return digest(name) % odds == 0
+
+
+class Account:
+    """
+    Synthetic AWS account generated from a seed:
+        functions           Number of Lambda functions, spread over regions
+        shared_roles        Execution roles shared between functions
+        role_sharing        Ratio of functions using a shared role (others get their own)
+        shared_layers       Layers shared between functions
+        layer_sharing       Ratio of functions using a shared layer (others get their own)
+        shared_resources    S3/SQS/SNS/DynamoDB resources shared between roles, per type
+        resource_sharing    Ratio of role resources and mappings pointing to shared resources
+        mapping_ratio       Ratio of functions triggered by an SQS event source mapping
+        kms_ratio           Ratio of functions encrypted with a (shared) KMS key
+    """
+
+    def __init__(
+        self,
+        functions=1000,
+        regions=("eu-west-1", "us-east-1"),
+        shared_roles=10,
+        role_sharing=0.9,
+        shared_layers=3,
+        layer_sharing=0.9,
+        shared_resources=20,
+        resource_sharing=0.8,
+        mapping_ratio=0.3,
+        kms_ratio=0.2,
+        seed=0,
+    ):
+        self.random = Random(seed)
+        self.regions = list(regions)
+        self.resource_sharing = resource_sharing
+        self.shared_resources = shared_resources
+        self.functions = {region: [] for region in self.regions}
+        self.configs = {}
+        self.mappings = {region: [] for region in self.regions}
+        self.policies = {}
+        self.roles = {}
+        self.layers = {}
+
+        for idx in range(functions):
+            region = self.regions[idx % len(self.regions)]
+            name = f"function-{idx}"
+            arn = f"arn:aws:lambda:{region}:{ACCOUNT_ID}:function:{name}"
+            if self.random.random() < role_sharing:
+                role = self.get_role(f"shared-role-{self.random.randrange(shared_roles)}")
+            else:
+                role = self.get_role(f"{name}-role")
+            if self.random.random() < layer_sharing:
+                layer = self.get_layer(region, f"shared-layer-{self.random.randrange(shared_layers)}")
+            else:
+                layer = self.get_layer(region, f"{name}-layer")
+            config = {
+                "FunctionName": name,
+                "FunctionArn": arn,
+                "Runtime": self.random.choice(["python3.8", "nodejs12.x", "java11", "go1.x"]),
+                "Role": role,
+                "Handler": "index.handler",
+                "Description": f"Synthetic function {idx}",
+                "CodeSha256": md5(name.encode("utf-8")).hexdigest(),
+                "RevisionId": f"{idx}-1",
+                "LastModified": "2020-01-01T00:00:00.000+0000",
+                "Layers": [{"Arn": layer, "CodeSize": 1024}],
+            }
+            if self.random.random() < kms_ratio:
+                config["KMSKeyArn"] = f"arn:aws:kms:{region}:{ACCOUNT_ID}:key/key-{self.random.randrange(5)}"
+            self.functions[region].append(config)
+            self.configs[arn] = config
+            if self.random.random() < mapping_ratio:
+                queue = self.get_resource("sqs", region, name)
+                self.mappings[region].append({"FunctionArn": arn, "EventSourceArn": queue, "State": "Enabled"})
+
+        self.policies[LAMBDA_WRITE] = document(
+            {"Effect": "Allow", "Action": "lambda:UpdateFunctionCode", "Resource": f"arn:aws:lambda:*:{ACCOUNT_ID}:*"}
+        )
+        self.policies[READ_ONLY] = document(
+            {"Effect": "Allow", "Action": ["lambda:Get*", "lambda:List*"], "Resource": "*"}
+        )
+
+    def get_resource(self, service, region, owner):
+        """
+        Returns ARN of a shared resource or a resource owned by given function or role
+        """
+        if self.random.random() < self.resource_sharing:
+            name = f"shared-{service}-{self.random.randrange(self.shared_resources)}"
+        else:
+            name = f"{owner}-{service}"
+        if service == "s3":
+            return f"arn:aws:s3:::{name}"
+        if service == "dynamodb":
+            return f"arn:aws:dynamodb:{region}:{ACCOUNT_ID}:table/{name}"
+        return f"arn:aws:{service}:{region}:{ACCOUNT_ID}:{name}"
+
+    def get_role(self, name):
+        arn = f"arn:aws:iam::{ACCOUNT_ID}:role/{name}"
+        if name not in self.roles:
+            statements = []
+            for service in self.random.sample(sorted(ACTIONS), 2):
+                resource = self.get_resource(service, self.random.choice(self.regions), name)
+                statements.append({"Effect": "Allow", "Action": ACTIONS[service], "Resource": resource})
+            self.roles[name] = {
+                "RoleName": name,
+                "Arn": arn,
+                "RolePolicyList": [{"PolicyName": "resources", "PolicyDocument": document(*statements)}],
+                "AttachedManagedPolicies": [],
+            }
+        return arn
+
+    def get_layer(self, region, name):
+        arn = f"arn:aws:lambda:{region}:{ACCOUNT_ID}:layer:{name}:1"
+        self.layers[arn] = {"LayerVersionArn": arn, "Description": name, "Content": {"Location": "https://layer"}}
+        return arn
+
+    def get_function(self, region, name):
+        return self.configs[f"arn:aws:lambda:{region}:{ACCOUNT_ID}:function:{name}"]
+
+    def get_snapshot(self):
+        """
+        Returns get_account_authorization_details data, policy documents URL-quoted as IAM does
+        """
+
+        def policy(arn, doc):
+            return {
+                "PolicyName": arn.split("/")[-1],
+                "Arn": arn,
+                "DefaultVersionId": "v1",
+                "AttachmentCount": 1,
+                "PolicyVersionList": [
+                    {"Document": quote(json.dumps(doc)), "VersionId": "v1", "IsDefaultVersion": True}
+                ],
+            }
+
+        roles = []
+        for role in self.roles.values():
+            inline = [dict(_, PolicyDocument=quote(json.dumps(_["PolicyDocument"]))) for _ in role["RolePolicyList"]]
+            roles.append(dict(role, RolePolicyList=inline))
+        return {
+            "UserDetailList": [
+                {
+                    "UserName": "scanner",
+                    "Arn": SCANNER,
+                    "UserPolicyList": [],
+                    "GroupList": [],
+                    "AttachedManagedPolicies": [{"PolicyName": "ReadOnlyAccess", "PolicyArn": READ_ONLY}],
+                }
+            ],
+            "GroupDetailList": [],
+            "RoleDetailList": roles,
+            "Policies": [policy(arn, doc) for arn, doc in self.policies.items()],
+        }
+
+    def respond(self, service, region, operation, params):
+        """
+        Returns (HTTP status, parsed response) for given API call
+        """
+        if service == "lambda":
+            if operation == "GetAccountSettings":
+                return 200, {"AccountUsage": {"FunctionCount": len(self.functions.get(region, []))}}
+            if operation == "ListFunctions":
+                return 200, page(self.functions[region], params, "Functions", "NextMarker")
+            if operation in ["GetFunction", "GetFunctionConfiguration"]:
+                config = self.get_function(region, params["FunctionName"])
+                if operation == "GetFunction":
+                    return 200, {"Configuration": config, "Code": {"Location": "https://code"}}
+                return 200, config
+            if operation == "GetPolicy":
+                name = params["FunctionName"]
+                if unlucky(name, 2):
+                    return error(404, "ResourceNotFoundException")
+                principal = "*" if unlucky(name, 5) else {"Service": "s3.amazonaws.com"}
+                bucket = f"arn:aws:s3:::shared-s3-{digest(name) % self.shared_resources}"
+                statement = {
+                    "Effect": "Allow",
+                    "Principal": principal,
+                    "Action": "lambda:InvokeFunction",
+                    "Resource": "*",
+                    "Condition": {"ArnLike": {"AWS:SourceArn": bucket}},
+                }
+                return 200, {"Policy": json.dumps(document(statement))}
+            if operation == "ListEventSourceMappings":
+                mappings = self.mappings[region]
+                if "FunctionName" in params:
+                    name = params["FunctionName"]
+                    mappings = [_ for _ in mappings if _["FunctionArn"].split(":")[-1] == name]
+                return 200, page(mappings, params, "EventSourceMappings", "NextMarker")
+            if operation == "GetLayerVersionByArn":
+                return 200, self.layers[params["Arn"]]
+        if service == "sts" and operation == "GetCallerIdentity":
+            return 200, {"UserId": "AIDA", "Account": ACCOUNT_ID, "Arn": SCANNER}
+        if service == "iam":
+            if operation == "GetAccountAuthorizationDetails":
+                snapshot = self.get_snapshot()
+                ret = page(snapshot.pop("RoleDetailList"), params, "RoleDetailList", "Marker")
+                ret["IsTruncated"] = "Marker" in ret
+                if not params.get("Marker"):
+                    ret.update(snapshot)
+                return 200, ret
+            if operation == "SimulateCustomPolicy":
+                results = [{"EvalActionName": _, "EvalDecision": "allowed"} for _ in params["ActionNames"]]
+                return 200, {"EvaluationResults": results, "IsTruncated": False}
+        if service == "s3":
+            bucket = params["Bucket"]
+            if operation == "GetBucketPolicy":
+                if not unlucky(bucket, 3):
+                    return error(404, "NoSuchBucketPolicy")
+                statement = {"Effect": "Allow", "Principal": "*", "Action": "s3:GetObject", "Resource": "*"}
+                return 200, {"Policy": json.dumps(document(statement))}
+            if operation == "GetBucketAcl":
+                grants = [{"Grantee": {"Type": "CanonicalUser", "ID": "owner"}, "Permission": "FULL_CONTROL"}]
+                if unlucky(bucket, 4):
+                    uri = "http://acs.amazonaws.com/groups/global/AllUsers"
+                    grants.append({"Grantee": {"Type": "Group", "URI": uri}, "Permission": "READ"})
+                return 200, {"Owner": {"ID": "owner"}, "Grants": grants}
+            if operation == "GetBucketEncryption":
+                if unlucky(bucket, 2):
+                    return error(404, "ServerSideEncryptionConfigurationNotFoundError")
+                rule = {"ApplyServerSideEncryptionByDefault": {"SSEAlgorithm": "AES256"}}
+                return 200, {"ServerSideEncryptionConfiguration": {"Rules": [rule]}}
+        if service == "sqs" and operation == "GetQueueAttributes":
+            principal = "*" if unlucky(params["QueueUrl"], 3) else {"AWS": ACCOUNT_ID}
+            statement = {"Effect": "Allow", "Principal": principal, "Action": "sqs:SendMessage", "Resource": "*"}
+            return 200, {"Attributes": {"Policy": json.dumps(document(statement))}}
+        if service == "sns" and operation == "GetTopicAttributes":
+            principal = "*" if unlucky(params["TopicArn"], 3) else {"AWS": ACCOUNT_ID}
+            statement = {"Effect": "Allow", "Principal": principal, "Action": "sns:Publish", "Resource": "*"}
+            return 200, {"Attributes": {"Policy": json.dumps(document(statement))}}
+        if service == "dynamodb" and operation == "DescribeTable":
+            return 200, {"Table": {"TableName": params["TableName"], "TableStatus": "ACTIVE"}}
+        if service == "kms":
+            if operation == "ListKeyPolicies":
+                return 200, {"PolicyNames": ["default"], "Truncated": False}
+            if operation == "GetKeyPolicy":
+                principal = "*" if unlucky(params["KeyId"], 2) else {"AWS": ACCOUNT_ID}
+                statement = {"Effect": "Allow", "Principal": principal, "Action": "kms:*", "Resource": "*"}
+                return 200, {"Policy": json.dumps(document(statement))}
+            if operation == "GetKeyRotationStatus":
+                return 200, {"KeyRotationEnabled": not unlucky(params["KeyId"], 2)}
+        return error(400, "InvalidAction")
+
+
+def page(items, params, key, marker):
+    """
+    Returns a page of items, marker pagination as most AWS APIs
+    """
+    start = int(params.get("Marker") or 0)
+    end = start + (params.get("MaxItems") or 50)
+    ret = {key: items[start:end]}
+    if end < len(items):
+        ret[marker] = str(end)
+    return ret
+
+
+def error(status, code):
+    return status, {"Error": {"Code": code, "Message": code}, "ResponseMetadata": {"HTTPStatusCode": status}}
+
+
+class StandIn:
+    """
+    Serves a synthetic Account to botocore clients, without network access
+    Counts API calls, optionally waits latency seconds per call
+    """
+
+    def __init__(self, account, latency=0):
+        self.account = account
+        self.latency = latency
+        self.lock = Lock()
+        self.calls = Counter()
+
+    def install(self, client, scope=None):
+        service = client.meta.service_model.service_name
+        service_id = client.meta.service_model.service_id.hyphenize()
+        region = client.meta.region_name
+
+        def before_parameter_build(params, model, context, **kwargs):
+            context["standin_params"] = dict(params)
+
+        def before_call(model, context, **kwargs):
+            with self.lock:
+                self.calls[f"{service}.{model.name}"] += 1
+            if self.latency:
+                sleep(self.latency)
+            status, parsed = self.account.respond(service, region, model.name, context["standin_params"])
+            return AWSResponse("", status, {}, None), parsed
+
+        client.meta.events.register(f"before-parameter-build.{service_id}", before_parameter_build)
+        # Last, so that hooks under test (persistent cache, replayer) can answer first
+        client.meta.events.register_last(f"before-call.{service_id}", before_call)
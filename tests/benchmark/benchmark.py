@@ -0,0 +1,246 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+from collections import Counter
+from functools import wraps
+from pathlib import Path
+from resource import RUSAGE_CHILDREN, RUSAGE_SELF, getrusage
+from tempfile import TemporaryDirectory
+from threading import Lock
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parents[2]))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from account import Account, StandIn  # noqa: E402
+
+import lambdaguard  # noqa: E402
+from lambdaguard.core.IAM import IAM  # noqa: E402
+from lambdaguard.core.Lambda import Lambda  # noqa: E402
+from lambdaguard.core.STS import STS  # noqa: E402
+from lambdaguard.security.LambdaWrite import LambdaWrite  # noqa: E402
+from lambdaguard.security.Report import SecurityReport  # noqa: E402
+from lambdaguard.visibility.HTMLReport import HTMLReport  # noqa: E402
+from lambdaguard.visibility.Report import VisibilityReport  # noqa: E402
+from lambdaguard.visibility.Statistics import Statistics  # noqa: E402
+
+# Phases of run() and the functions they are timed in
+PHASES = [
+    ("regions", lambdaguard, ["get_usage"]),
+    ("iam", IAM, ["__init__"]),
+    ("identity", STS, ["__init__"]),
+    ("writes", LambdaWrite, ["__init__"]),
+    ("hydration", Lambda, ["get_function", "get_policy", "get_triggers", "get_resources"]),
+    ("scan", Lambda, ["get_security"]),
+    ("visibility", VisibilityReport, ["save"]),
+    ("statistics", Statistics, ["parse"]),
+    ("security", SecurityReport, ["save"]),
+    ("html", HTMLReport, ["save"]),
+]
+
+
+class Timers:
+    """
+    Seconds spent per phase, summed over threads
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.seconds = Counter()
+
+    def add(self, phase, start):
+        with self.lock:
+            self.seconds[phase] += perf_counter() - start
+
+    def timed(self, phase, func):
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(phase, start)
+
+        return wrapper
+
+    def timed_generator(self, phase, func):
+        def wrapper(*args, **kwargs):
+            iterator = func(*args, **kwargs)
+            while True:
+                start = perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.add(phase, start)
+                yield item
+
+        return wrapper
+
+    def install(self):
+        for phase, owner, names in PHASES:
+            for name in names:
+                setattr(owner, name, self.timed(phase, getattr(owner, name)))
+        lambdaguard.get_functions = self.timed_generator("listing", lambdaguard.get_functions)
+
+
+def peak_rss(who=RUSAGE_SELF):
+    """
+    Returns peak resident set size in MB, of this process or its largest child
+    """
+    rss = getrusage(who).ru_maxrss
+    return rss / 1024 ** 2 if sys.platform == "darwin" else rss / 1024
+
+
+def collect_workers(standin, timers, path):
+    """
+    Worker processes of --processes are forked with the stand-in and timers installed.
+    Each audited region dumps the calls and phase timings of its worker under path,
+    summed up by the parent with sum_workers().
+    """
+    audit_region = lambdaguard.audit_region
+
+    @wraps(audit_region)  # Pickled by name to the workers
+    def wrapper(args, region, *arguments):
+        # Forked copies start with the counts of the parent
+        standin.calls.clear()
+        timers.seconds.clear()
+        try:
+            return audit_region(args, region, *arguments)
+        finally:
+            measurements = {"calls": standin.calls, "phases": timers.seconds}
+            Path(path, f"{os.getpid()}-{region}.json").write_text(json.dumps(measurements))
+
+    lambdaguard.audit_region = wrapper
+
+
+def sum_workers(standin, timers, path):
+    for worker in Path(path).glob("*.json"):
+        measurements = json.loads(worker.read_text())
+        standin.calls.update(measurements["calls"])
+        timers.seconds.update(measurements["phases"])
+
+
+def measure(args):
+    """
+    Scans a synthetic account of args.functions functions in this process
+    Returns measurements as a dict
+    """
+    start = perf_counter()
+    account = Account(
+        functions=args.functions,
+        regions=args.regions.split(","),
+        shared_roles=args.shared_roles,
+        role_sharing=args.role_sharing,
+        shared_layers=args.shared_layers,
+        layer_sharing=args.layer_sharing,
+        shared_resources=args.shared_resources,
+        resource_sharing=args.resource_sharing,
+        mapping_ratio=args.mapping_ratio,
+        kms_ratio=args.kms_ratio,
+        seed=args.seed,
+    )
+    generated = perf_counter() - start
+
+    standin = StandIn(account, args.latency)
+    get_hooks = lambdaguard.get_hooks
+    lambdaguard.get_hooks = lambda _: [standin] + get_hooks(_)
+    timers = Timers()
+    timers.install()
+
+    with TemporaryDirectory() as output, TemporaryDirectory() as workers:
+        collect_workers(standin, timers, workers)
+        start = perf_counter()
+        lambdaguard.run(f"-o {output} -r {args.regions} -k AKID SECRET -w {args.workers} {args.extra}")
+        wall = perf_counter() - start
+        lambdas = json.loads(Path(output, "statistics.json").read_text())["lambdas"]
+        sum_workers(standin, timers, workers)
+
+    return {
+        "functions": args.functions,
+        "lambdas": lambdas,
+        "generated": generated,
+        "wall": wall,
+        "calls": sum(standin.calls.values()),
+        "rss": peak_rss(),
+        "workers_rss": peak_rss(RUSAGE_CHILDREN),
+        "phases": dict(timers.seconds),
+        "operations": dict(standin.calls),
+    }
+
+
+def report(results):
+    phases = ["listing"] + [_[0] for _ in PHASES]
+    header = ["functions", "wall s", "calls", "peak MB", "worker MB"] + phases
+    print(" ".join(_.rjust(10) for _ in header))
+    for result in results:
+        row = [str(result["functions"]), f"{result['wall']:.2f}", str(result["calls"]), f"{result['rss']:.0f}"]
+        row += [f"{result['workers_rss']:.0f}"]
+        row += [f"{result['phases'].get(_, 0):.2f}" for _ in phases]
+        print(" ".join(_.rjust(10) for _ in row))
+
+
+def parse_args(arguments=None):
+    parser = argparse.ArgumentParser(description="LambdaGuard scaling benchmark on a synthetic account")
+    parser.add_argument("--scales", default="1000,10000,50000", help="Comma-separated numbers of functions")
+    parser.add_argument("--functions", type=int, help="Measure a single scale in this process (JSON output)")
+    parser.add_argument("--regions", default="eu-west-1,us-east-1")
+    parser.add_argument("--shared-roles", type=int, default=10)
+    parser.add_argument("--role-sharing", type=float, default=0.9)
+    parser.add_argument("--shared-layers", type=int, default=3)
+    parser.add_argument("--layer-sharing", type=float, default=0.9)
+    parser.add_argument("--shared-resources", type=int, default=20)
+    parser.add_argument("--resource-sharing", type=float, default=0.8)
+    parser.add_argument("--mapping-ratio", type=float, default=0.3)
+    parser.add_argument("--kms-ratio", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0, help="Seconds per API call")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--extra", default="", help="Extra LambdaGuard arguments, e.g. '--processes 4'")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    return parser.parse_args(arguments)
+
+
+def main():
+    args = parse_args()
+    processes = "-P" in args.extra.split() or "--processes" in args.extra
+    if processes and multiprocessing.get_start_method() != "fork":
+        # Spawned workers would not be served by the stand-in account
+        sys.exit("--processes is only measured where worker processes are forked")
+    if args.functions:
+        print(json.dumps(measure(args)))
+        return
+
+    # Each scale in its own process, so peak RSS is measured per scale
+    results = []
+    for scale in args.scales.split(","):
+        arguments = [_ for _ in sys.argv[1:] if _ != "--json"] + ["--functions", scale]
+        output = subprocess.run(
+            [sys.executable, __file__] + arguments, check=True, stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout
+        results.append(json.loads(output.strip().split("\n")[-1]))
+    if args.json:
+        print(json.dumps(results, indent=4))
+    else:
+        report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from account import Account  # noqa: E402
+
+
+class Test(unittest.TestCase):
+    def test_account(self):
+        account = Account(functions=100, shared_roles=4, role_sharing=0.5, seed=1)
+        self.assertEqual(sum(len(_) for _ in account.functions.values()), 100)
+        # Shared and unique roles
+        self.assertGreater(len(account.roles), 4)
+        self.assertLess(len(account.roles), 100)
+        # Same seed, same account
+        self.assertEqual(account.functions, Account(functions=100, shared_roles=4, role_sharing=0.5, seed=1).functions)
+
+    def measure(self, *arguments):
+        # Separate process, phases are timed by patching lambdaguard
+        output = subprocess.run(
+            [sys.executable, str(Path(__file__).parent.joinpath("benchmark.py")), "--functions", "40"]
+            + list(arguments),
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+        ).stdout
+        return json.loads(output.strip().split("\n")[-1])
+
+    def test_measure(self):
+        result = self.measure("--workers", "4")
+        self.assertEqual(result["lambdas"], 40)
+        self.assertEqual(result["operations"]["lambda.ListFunctions"], 2)
+        for phase in ["listing", "hydration", "scan", "visibility", "statistics", "security", "html"]:
+            self.assertIn(phase, result["phases"])
+
+    def test_measure_processes(self):
+        # Calls and phases of worker processes are counted
+        result = self.measure("--extra", "--processes 2")
+        self.assertEqual(result["lambdas"], 40)
+        self.assertEqual(result["operations"]["lambda.ListFunctions"], 2)
+        for phase in ["listing", "hydration", "scan", "visibility", "statistics", "security", "html"]:
+            self.assertIn(phase, result["phases"])
+        self.assertGreater(result["workers_rss"], 0)
@@ -0,0 +1,101 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import pickle
+import unittest
+from pathlib import Path
+
+from lambdaguard.core.IAM import IAM
+from lambdaguard.core.Role import Role
+from lambdaguard.security.LambdaWrite import LambdaWrite
+from lambdaguard.utils.acl import ACL
+
+
+class IAMHook(IAM):
+    """
+    Hooking AWS generators for data mocking
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        super().__init__()
+
+    def get_pages(self):
+        yield from self.pages
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = Path(__file__).parents[2].joinpath("fixtures")
+        details = json.loads(cls.fixtures.joinpath("AccountAuthorizationDetails.json").read_text())
+        # Split details into pages
+        cls.pages = [{idx: items} for idx, items in details.items()]
+
+    def setUp(self):
+        IAM.snapshot = IAMHook(self.pages)
+
+    def tearDown(self):
+        IAM.snapshot = None
+
+    def test_index(self):
+        snapshot = IAM.snapshot
+        self.assertEqual(list(snapshot.users.keys()), ["scanner"])
+        self.assertEqual(list(snapshot.groups.keys()), ["auditors"])
+        self.assertEqual(list(snapshot.roles.keys()), ["role-name"])
+        self.assertEqual(len(snapshot.policies), 3)
+        # Only default versions are kept
+        version = snapshot.get_policy_version("arn:aws:iam::0:policy/lambda-write")
+        self.assertEqual(version["VersionId"], "v2")
+        self.assertIsNone(snapshot.get_policy_version("arn:aws:iam::0:policy/missing"))
+
+    def test_get_role(self):
+        snapshot = IAM.snapshot
+        self.assertEqual(snapshot.get_role("arn:aws:iam::0:role/service-role/role-name")["RoleName"], "role-name")
+        # Same name in another account
+        self.assertIsNone(snapshot.get_role("arn:aws:iam::1:role/service-role/role-name"))
+        self.assertIsNone(snapshot.get_role("arn:aws:iam::0:role/missing"))
+
+    def test_get_local_policies(self):
+        policies = dict(IAM.snapshot.get_local_policies())
+        self.assertEqual(list(policies.keys()), ["arn:aws:iam::0:policy/lambda-write"])
+
+    def test_load(self):
+        # Failed snapshots are discarded
+        self.assertIsNone(IAMHook.load())  # Invalid arguments
+        self.assertIsNone(IAM.snapshot)
+
+    def test_pickle(self):
+        # Snapshot is passed to worker processes without its client
+        snapshot = pickle.loads(pickle.dumps(IAM.snapshot))
+        self.assertEqual(snapshot.roles, IAM.snapshot.roles)
+        self.assertEqual(snapshot.client.meta.service_model.service_name, "iam")
+
+    def test_role(self):
+        role = Role("arn:aws:iam::0:role/service-role/role-name")
+        self.assertEqual(
+            [(_["name"], _["type"]) for _ in role.policy["policies"]],
+            [("lambda-write", "managed"), ("role-inline", "inline")],
+        )
+        self.assertEqual(role.policy["policies"][0]["arn"], "arn:aws:iam::0:policy/lambda-write")
+
+    def test_acl(self):
+        acl = ACL("arn:aws:iam::0:user/scanner")
+        actions = [_["Statement"][0]["Action"] for _ in acl.policy_documents]
+        self.assertEqual(actions, [["lambda:Get*", "lambda:List*"], "lambda:List*", "iam:Get*"])
+
+    def test_lambda_write(self):
+        writes = LambdaWrite(None).writes
+        self.assertEqual(writes, {"*": {"arn:aws:iam::0:policy/lambda-write": ["lambda:UpdateFunctionCode"]}})
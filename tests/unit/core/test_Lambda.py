@@ -0,0 +1,198 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.awsrequest import AWSResponse
+
+from lambdaguard.core.Lambda import (
+    Lambda,
+    digest,
+    get_event_source_mappings,
+    get_fingerprint,
+    get_layer_version,
+    layers,
+    mappings,
+)
+from lambdaguard.core.Role import roles
+from lambdaguard.utils import clients
+from lambdaguard.utils.cli import parse_args
+
+FUNCTION = "arn:aws:lambda:eu-west-1:0:function:{}"
+PAGES = {
+    None: {
+        "EventSourceMappings": [
+            {"FunctionArn": FUNCTION.format("a"), "EventSourceArn": "arn:aws:sqs:eu-west-1:0:queue-1"},
+            {"FunctionArn": FUNCTION.format("b"), "EventSourceArn": "arn:aws:sqs:eu-west-1:0:queue-2"},
+        ],
+        "NextMarker": "next",
+    },
+    "next": {
+        "EventSourceMappings": [
+            {"FunctionArn": FUNCTION.format("a"), "EventSourceArn": "arn:aws:sqs:eu-west-1:0:queue-3"},
+        ],
+    },
+}
+LISTING = {
+    "FunctionArn": FUNCTION.format("a"),
+    "Runtime": "python3.8",
+    "Handler": "app.handler",
+    "Description": "listed",
+    "Role": "arn:aws:iam::0:role/a",
+    "Layers": [{"Arn": "arn:aws:lambda:eu-west-1:0:layer:shared:1", "CodeSize": 1}],
+}
+RESPONSES = {
+    "GetFunction": {"Configuration": dict(LISTING, Description="fetched"), "Code": {"Location": "https://code"}},
+    "GetFunctionConfiguration": dict(LISTING, Description="fetched"),
+    "GetLayerVersionByArn": {
+        "LayerVersionArn": "arn:aws:lambda:eu-west-1:0:layer:shared:1",
+        "Description": "shared",
+        "Content": {"Location": "https://layer"},
+    },
+    "ListAttachedRolePolicies": {"AttachedPolicies": []},
+    "ListRolePolicies": {"PolicyNames": []},
+}
+
+
+class StubHook:
+    """
+    Hooking all AWS calls for data mocking
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def install(self, client, scope=None):
+        service_id = client.meta.service_model.service_id.hyphenize()
+
+        def before_call(model, **kwargs):
+            self.calls.append(model.name)
+            return AWSResponse("", 200, {}, None), RESPONSES[model.name]
+
+        client.meta.events.register(f"before-call.{service_id}", before_call)
+
+
+class Identity:
+    class acl:
+        def allowed(action):
+            return True
+
+
+class LambdaHook(Lambda):
+    """
+    Hooking Lambda to audit the function configuration only
+    """
+
+    def get_policy(self):
+        self.policy = {}
+
+    def get_triggers(self):
+        pass
+
+    def get_resources(self):
+        pass
+
+    def get_security(self):
+        pass
+
+
+class Test(unittest.TestCase):
+    def test_get_event_source_mappings(self):
+        clients.configure()
+        mappings.clear()
+        calls = []
+
+        def list_event_source_mappings(params, **kwargs):
+            calls.append(params)
+            return AWSResponse("", 200, {}, None), PAGES[params["query_string"].get("Marker")]
+
+        client = clients.get_client("lambda", "eu-west-1", None, "id", "secret")
+        client.meta.events.register("before-call.lambda.ListEventSourceMappings", list_event_source_mappings)
+        index = get_event_source_mappings("eu-west-1", None, "id", "secret")
+        self.assertEqual(
+            [_["EventSourceArn"] for _ in index[FUNCTION.format("a")]],
+            ["arn:aws:sqs:eu-west-1:0:queue-1", "arn:aws:sqs:eu-west-1:0:queue-3"],
+        )
+        self.assertEqual(len(index[FUNCTION.format("b")]), 1)
+        self.assertNotIn(FUNCTION.format("c"), index)
+        # Listed once per region
+        self.assertIs(index, get_event_source_mappings("eu-west-1", None, "id", "secret"))
+        self.assertEqual(len(calls), 2)
+
+    def test_get_layer_version(self):
+        clients.configure()
+        layers.clear()
+        calls = []
+
+        def get_layer_version_by_arn(params, **kwargs):
+            calls.append(params)
+            return AWSResponse("", 200, {}, None), {
+                "LayerVersionArn": "arn:aws:lambda:eu-west-1:0:layer:shared:1",
+                "Description": "shared",
+                "Content": {"Location": "https://layer"},
+            }
+
+        client = clients.get_client("lambda", "eu-west-1", None, "id", "secret")
+        client.meta.events.register("before-call.lambda.GetLayerVersionByArn", get_layer_version_by_arn)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(
+                    lambda _: get_layer_version(client, "arn:aws:lambda:eu-west-1:0:layer:shared:1"), range(32)
+                )
+            )
+        self.assertEqual(
+            results[0],
+            {"arn": "arn:aws:lambda:eu-west-1:0:layer:shared:1", "description": "shared", "codeURL": "https://layer"},
+        )
+        # Fetched once, shared between threads
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((layers.hits, layers.misses), (31, 1))
+
+    def test_get_fingerprint(self):
+        config = {"CodeSha256": "sha", "RevisionId": "rev", "LastModified": "today", "Runtime": "python3.8"}
+        policy = {"Statement": [{"Effect": "Allow", "Action": "lambda:InvokeFunction"}]}
+        fingerprint = get_fingerprint(config, policy, {"policies": []}, [])
+        self.assertEqual(fingerprint["CodeSha256"], "sha")
+        self.assertEqual(fingerprint["policy"], digest(policy))
+        self.assertNotIn("Runtime", fingerprint)
+        # Key order does not matter
+        self.assertEqual(digest({"a": 1, "b": 2}), digest({"b": 2, "a": 1}))
+        # Any change in policies or event sources
+        self.assertNotEqual(fingerprint, get_fingerprint(config, {}, {"policies": []}, []))
+        self.assertNotEqual(fingerprint, get_fingerprint(config, policy, {"policies": [{}]}, []))
+        self.assertNotEqual(fingerprint, get_fingerprint(config, policy, {"policies": []}, [{"State": "Enabled"}]))
+        self.assertNotEqual(fingerprint, get_fingerprint(dict(config, RevisionId="new"), policy, {"policies": []}, []))
+
+    def test_get_function(self):
+        for sonarqube in ["", " -sq config.json"]:
+            stub = StubHook()
+            clients.configure(hooks=[stub])
+            roles.clear()
+            layers.clear()
+            args = parse_args(f"-k id secret{sonarqube}")
+            lmbd = LambdaHook(FUNCTION.format("a"), args, Identity, config=dict(LISTING))
+            self.assertEqual((lmbd.runtime, lmbd.handler), ("python3.8", "app.handler"))
+            self.assertEqual([_["arn"] for _ in lmbd.layers], ["arn:aws:lambda:eu-west-1:0:layer:shared:1"])
+            self.assertEqual(lmbd.role.arn.full, "arn:aws:iam::0:role/a")
+            if sonarqube:
+                # Code location is only returned by get_function
+                self.assertIn("GetFunction", stub.calls)
+                self.assertEqual((lmbd.description, lmbd.codeURL), ("fetched", "https://code"))
+            else:
+                # Configuration comes from the listing entry
+                self.assertNotIn("GetFunction", stub.calls)
+                self.assertNotIn("GetFunctionConfiguration", stub.calls)
+                self.assertEqual((lmbd.description, lmbd.codeURL), ("listed", ""))
+        clients.configure()
@@ -77,6 +77,8 @@ class Test(unittest.TestCase):
         self.assertTrue(is_write_action("LAMBDA:*"))
         self.assertTrue(is_write_action("lambda:Create*"))
         self.assertTrue(is_write_action("Lambda:TagResource"))
+        self.assertTrue(is_write_action("lambda:Up*"))
+        self.assertTrue(is_write_action("lambda:*Alias"))
         # False
         self.assertFalse(is_write_action("iam:*"))
         self.assertFalse(is_write_action("lambda:GetLayerVersionByArn"))
@@ -149,3 +151,70 @@ class Test(unittest.TestCase):
             print(actions)
         with self.assertRaises(StopIteration):
             next(writes)
+
+    def test_parse_deny(self):
+        hook = LambdaWriteHook()
+        policy = deepcopy(self.policy)
+        policy["Document"]["Statement"].append(
+            {"Effect": "Deny", "Action": "lambda:Delete*", "Resource": "arn:aws:lambda:eu-west-1:0:function:*"}
+        )
+        arn, actions = next(hook.parse(policy))
+        self.assertNotIn("lambda:DeleteFunction", actions)
+        self.assertIn("lambda:PublishVersion", actions)
+
+    def test_parse_scoped_deny(self):
+        hook = LambdaWriteHook()
+        policy = {
+            "Document": {
+                "Statement": [
+                    {"Effect": "Allow", "Action": "lambda:UpdateFunctionCode", "Resource": "*"},
+                    {
+                        "Effect": "Deny",
+                        "Action": "lambda:UpdateFunctionCode",
+                        "Resource": "arn:aws:lambda:eu-west-1:0:function:prod",
+                    },
+                ]
+            }
+        }
+        # A Deny on a single function does not remove the grant on all functions
+        self.assertEqual(list(hook.parse(policy)), [("*", ["lambda:UpdateFunctionCode"])])
+        policy["Document"]["Statement"][1]["Resource"] = "*"
+        self.assertEqual(list(hook.parse(policy)), [])
+
+    def test_parse_wildcard_deny(self):
+        hook = LambdaWriteHook()
+        policy = {
+            "Document": {
+                "Statement": [
+                    {"Effect": "Allow", "Action": "lambda:*", "Resource": "*"},
+                    {"Effect": "Deny", "Action": "lambda:UpdateFunctionCode", "Resource": "*"},
+                ]
+            }
+        }
+        arn, actions = next(hook.parse(policy))
+        self.assertEqual(arn, "*")
+        self.assertNotIn("lambda:*", actions)
+        self.assertNotIn("lambda:UpdateFunctionCode", actions)
+        self.assertIn("lambda:UpdateFunctionConfiguration", actions)
+
+    def test_parse_single_character_deny(self):
+        hook = LambdaWriteHook()
+        function = "arn:aws:lambda:eu-west-1:0:function:"
+        policy = {
+            "Document": {
+                "Statement": [
+                    {"Effect": "Allow", "Action": "lambda:UpdateFunctionCode", "Resource": f"{function}a*"},
+                    {"Effect": "Deny", "Action": "lambda:UpdateFunctionCode", "Resource": f"{function}a?"},
+                ]
+            }
+        }
+        # A Deny on a? leaves functions like abc writable
+        self.assertEqual(list(hook.parse(policy)), [(f"{function}a*", ["lambda:UpdateFunctionCode"])])
+        policy["Document"]["Statement"][0]["Resource"] = f"{function}a*c"
+        policy["Document"]["Statement"][1]["Resource"] = f"{function}a?c"
+        self.assertEqual(list(hook.parse(policy)), [(f"{function}a*c", ["lambda:UpdateFunctionCode"])])
+        # A Deny on a* covers a?c and a*c
+        policy["Document"]["Statement"][1]["Resource"] = f"{function}a*"
+        self.assertEqual(list(hook.parse(policy)), [])
+        policy["Document"]["Statement"][0]["Resource"] = f"{function}a?c"
+        self.assertEqual(list(hook.parse(policy)), [])
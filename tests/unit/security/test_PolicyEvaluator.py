@@ -0,0 +1,97 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import unittest
+from pathlib import Path
+
+from lambdaguard.security.PolicyEvaluator import PolicyEvaluator, Statement, match_action, match_resource
+from lambdaguard.security.PolicyStatement import PolicyStatement
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = Path(__file__).parents[2].joinpath("fixtures")
+
+    def test_match(self):
+        self.assertTrue(match_action("*", "s3:GetObject"))
+        self.assertTrue(match_action("S3:get*", "s3:GetObject"))
+        self.assertTrue(match_action("s3:Get?bject", "s3:GetObject"))
+        self.assertFalse(match_action("s3:Put*", "s3:GetObject"))
+        self.assertFalse(match_action("s3:Get", "s3:GetObject"))
+        self.assertTrue(match_resource("arn:aws:s3:::bucket/*", "arn:aws:s3:::bucket/key"))
+        self.assertFalse(match_resource("arn:aws:s3:::bucket/*", "arn:aws:s3:::BUCKET/key"))
+        self.assertFalse(match_resource("arn:aws:s3:::bucket.*", "arn:aws:s3:::bucketX"))
+
+    def test_allow_deny(self):
+        evaluator = PolicyEvaluator(
+            [
+                {"Statement": {"Effect": "Allow", "Action": "s3:*", "Resource": "*"}},
+                {"Statement": [{"Effect": "Deny", "Action": "s3:Delete*", "Resource": "arn:aws:s3:::prod/*"}]},
+            ]
+        )
+        self.assertEqual(evaluator.evaluate("s3:GetObject"), "allowed")
+        self.assertEqual(evaluator.evaluate("s3:DeleteObject", "arn:aws:s3:::dev/key"), "allowed")
+        self.assertEqual(evaluator.evaluate("s3:DeleteObject", "arn:aws:s3:::prod/key"), "explicitDeny")
+        self.assertEqual(evaluator.evaluate("s3:DeleteObject"), "explicitDeny")
+        self.assertEqual(evaluator.evaluate("sqs:SendMessage"), "implicitDeny")
+        # No policies
+        self.assertFalse(PolicyEvaluator([]).allowed("s3:GetObject"))
+
+    def test_not_action(self):
+        evaluator = PolicyEvaluator([{"Statement": [{"Effect": "Allow", "NotAction": "iam:*", "Resource": "*"}]}])
+        self.assertTrue(evaluator.allowed("s3:GetObject"))
+        self.assertFalse(evaluator.allowed("iam:PassRole"))
+
+    def test_not_resource(self):
+        evaluator = PolicyEvaluator(
+            [{"Statement": [{"Effect": "Allow", "Action": "s3:*", "NotResource": "arn:aws:s3:::secret/*"}]}]
+        )
+        self.assertTrue(evaluator.allowed("s3:GetObject", "arn:aws:s3:::public/key"))
+        self.assertFalse(evaluator.allowed("s3:GetObject", "arn:aws:s3:::secret/key"))
+        self.assertTrue(evaluator.allowed("s3:GetObject"))
+
+    def test_condition(self):
+        evaluator = PolicyEvaluator(
+            [{"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*", "Condition": {"Bool": {"x": "y"}}}]}]
+        )
+        self.assertFalse(evaluator.allowed("s3:GetObject"))
+
+    def test_covers(self):
+        function = "arn:aws:lambda:eu-west-1:0:function:prod"
+        deny = Statement({"Effect": "Deny", "Action": "lambda:Update*", "Resource": function})
+        self.assertTrue(deny.covers("lambda:UpdateFunctionCode", function))
+        self.assertFalse(deny.covers("lambda:UpdateFunctionCode", "*"))
+        self.assertFalse(deny.covers("lambda:DeleteFunction", function))
+        deny = Statement({"Effect": "Deny", "Action": "lambda:*", "Resource": "arn:aws:lambda:*:0:function:*"})
+        self.assertTrue(deny.covers("lambda:UpdateFunctionCode", "arn:aws:lambda:eu-west-1:0:function:a*"))
+        self.assertFalse(deny.covers("lambda:UpdateFunctionCode", "arn:aws:lambda:eu-west-1:0:*"))
+        deny = Statement({"Effect": "Deny", "Action": "*", "Resource": "*", "Condition": {"Bool": {}}})
+        self.assertFalse(deny.covers("lambda:UpdateFunctionCode", "*"))
+
+    def test_policy_fixtures(self):
+        policy = json.loads(self.fixtures.joinpath("PolicyVersion.json").read_text())
+        evaluator = PolicyEvaluator([policy["Document"]])
+        arn = "arn:aws:lambda:eu-west-1:0:function:functionName"
+        self.assertTrue(evaluator.allowed("lambda:DeleteFunction", arn))
+        self.assertFalse(evaluator.allowed("lambda:DeleteFunction", arn.replace("functionName", "other")))
+        self.assertTrue(evaluator.allowed("lambda:CreateEventSourceMapping", arn))
+
+    def test_policy_statement(self):
+        statement = PolicyStatement({"Effect": "Allow", "Action": "iam:*", "Resource": "*"})
+        self.assertTrue(statement.allows("iam:PassRole"))
+        self.assertFalse(statement.allows("sts:AssumeRole"))
+        statement = PolicyStatement({"Effect": "Deny", "Action": "*", "Resource": "*"})
+        self.assertFalse(statement.allows("iam:PassRole"))
@@ -16,7 +16,7 @@ import json
 import unittest
 from pathlib import Path
 
-from lambdaguard.security.PolicyStatement import PolicyStatement
+from lambdaguard.security.PolicyStatement import PolicyStatement, audits
 
 
 class Test(unittest.TestCase):
@@ -56,3 +56,20 @@ class Test(unittest.TestCase):
         statement = {"Effect": "Allow", "NotAction": "sqs:SendMessage"}
         expected = "NotAction with Allow"
         self.assertTrue(expected in next(PolicyStatement(statement).audit())["text"])
+
+    def test_audit_cached(self):
+        audits.clear()
+        statement = {"Effect": "Allow", "Action": "iam:PutRolePolicy", "Resource": "*"}
+        inline = {"name": "baseline", "type": "inline", "document": {}}
+        findings = list(PolicyStatement(statement, policy=inline).audit())
+        for _ in findings:
+            _["where"] = "arn"  # Tracked findings are copies of the cached ones
+        cached = list(PolicyStatement(dict(statement), policy=dict(inline)).audit())
+        self.assertEqual((audits.hits, audits.misses), (1, 1))
+        self.assertEqual(len(cached), len(findings))
+        self.assertTrue(all("where" not in _ for _ in cached))
+        self.assertTrue(any("Inline policies in Role Policy baseline" in _["text"] for _ in cached))
+
+        managed = list(PolicyStatement(statement, policy={"name": "baseline", "type": "managed"}).audit())
+        self.assertEqual((audits.hits, audits.misses), (1, 2))
+        self.assertFalse(any("Inline policies" in _["text"] for _ in managed))
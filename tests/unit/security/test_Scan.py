@@ -0,0 +1,43 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from argparse import Namespace
+
+from lambdaguard.security.Scan import Scan
+
+ARN = "arn:aws:lambda:eu-west-1:0:function:a"
+
+
+def report():
+    return {
+        "arn": ARN,
+        "role": "arn:aws:iam::0:role/a",
+        "policy": {"function": {}, "role": {"policies": []}},
+        "triggers": {"items": {}},
+        "resources": {"services": ["logs"], "items": {}},
+        "layers": [],
+    }
+
+
+class Test(unittest.TestCase):
+    def test_track(self):
+        scan = Scan(report(), Namespace(profile=None, keys=[None, None], sonarqube=None, output="/tmp"))
+        self.assertEqual(scan.security["count"], {"info": 2})
+        for level in ["low", "high", "high", "medium", "low"]:
+            scan.track(ARN, {"level": level, "text": f"{level} finding"})
+        scan.scan()  # Findings of a rescan are already tracked
+        self.assertEqual(scan.security["count"], {"info": 2, "low": 1, "high": 1, "medium": 1})
+        self.assertEqual([_["level"] for _ in scan.security["items"]], ["high", "medium", "low", "info", "info"])
+        self.assertEqual(scan.security["items"][0], {"level": "high", "text": "high finding", "where": ARN})
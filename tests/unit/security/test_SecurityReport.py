@@ -0,0 +1,55 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lambdaguard.security.Report import SecurityReport
+from lambdaguard.visibility.Report import VisibilityReport
+
+
+def report(name, *levels):
+    items = [{"level": level, "where": name, "text": f"{level} finding\nin {name}"} for level in levels]
+    return {"arn": f"arn:aws:lambda:eu-west-1:0:function:{name}", "security": {"items": items}}
+
+
+class Test(unittest.TestCase):
+    def test_save(self):
+        with TemporaryDirectory() as tmp:
+            visibility = VisibilityReport(tmp)
+            visibility.save(report("a", "info", "high"))
+            visibility.save(report("b", "low", "high", "medium"))
+            visibility.save(report("c"))
+            visibility.save_index()
+            SecurityReport(tmp).save(jsonl=True)
+            text = Path(tmp, "security.json").read_text()
+            findings = json.loads(text)
+            lines = [json.loads(_) for _ in Path(tmp, "security.jsonl").read_text().splitlines()]
+            files = sorted(_.name for _ in Path(tmp).iterdir())
+        self.assertEqual(
+            [(_["where"], _["level"]) for _ in findings],
+            [("a", "high"), ("b", "high"), ("b", "medium"), ("b", "low"), ("a", "info")],
+        )
+        self.assertEqual(text, json.dumps(findings, indent=4))
+        self.assertEqual(lines, findings)
+        self.assertEqual(files, ["index.json", "reports", "security.json", "security.jsonl"])
+
+    def test_save_empty(self):
+        with TemporaryDirectory() as tmp:
+            VisibilityReport(tmp).save_index()
+            SecurityReport(tmp).save()
+            self.assertEqual(Path(tmp, "security.json").read_text(), "[]")
+            self.assertFalse(Path(tmp, "security.jsonl").exists())
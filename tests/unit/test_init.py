@@ -12,11 +12,53 @@ under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
 CONDITIONS OF ANY KIND, either express or implied. See the License for the
 specific language governing permissions and limitations under the License.
 """
+import json
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock
+from time import sleep
+from unittest.mock import patch
 
-from lambdaguard import get_regions
+from botocore.awsrequest import AWSResponse
+
+from lambdaguard import (
+    SNAPSHOT_MIN_FUNCTIONS,
+    audit,
+    carry_forward,
+    get_available_regions,
+    get_regions,
+    get_reports,
+    get_usage,
+    use_snapshot,
+)
+from lambdaguard.security import Scan
+from lambdaguard.utils import clients
+from lambdaguard.utils.arnparse import arnparse
 from lambdaguard.utils.cli import parse_args
+from lambdaguard.visibility.Report import VisibilityReport
+
+
+def hook(args, counts):
+    """
+    Hooking get_account_settings for data mocking
+    """
+    clients.configure()
+    for region, count in counts.items():
+
+        def get_account_settings(count=count, **kwargs):
+            if callable(count):
+                count = count()
+            if count is None:
+                raise Exception("Region unavailable")
+            return AWSResponse("", 200, {}, None), {"AccountUsage": {"FunctionCount": count}}
+
+        client = clients.get_client("lambda", region, args.profile, args.keys[0], args.keys[1])
+        client.meta.events.register("before-call.lambda.GetAccountSettings", get_account_settings)
+        client.meta.events.register(
+            "before-call.lambda.ListFunctions",
+            lambda region=region, **kwargs: (AWSResponse("", 200, {}, None), {"Functions": [{"FunctionArn": region}]}),
+        )
 
 
 class Test(unittest.TestCase):
@@ -50,3 +92,129 @@ class Test(unittest.TestCase):
             get_regions(args)
         with self.assertRaises(ValueError):
             get_regions(parse_args("-r test"))
+
+    def test_get_available_regions(self):
+        # Loaded once
+        self.assertIs(get_available_regions(), get_available_regions())
+
+    def test_get_usage(self):
+        args = parse_args("-r eu-west-1,us-east-1,ap-east-1,eu-north-1 -k id secret")
+        hook(args, {"eu-west-1": 3, "us-east-1": 0, "ap-east-1": None, "eu-north-1": 5})
+        listings = {}
+        usage = get_usage(args, listings)
+        self.assertEqual(list(usage.items()), [("eu-west-1", 3), ("eu-north-1", 5)])
+        self.assertEqual(sorted(listings.keys()), ["eu-north-1", "eu-west-1"])
+        self.assertEqual(next(listings["eu-west-1"])["Functions"], [{"FunctionArn": "eu-west-1"}])
+
+    def test_get_usage_timeout(self):
+        args = parse_args("-r eu-west-1,us-east-1,ap-east-1 -k id secret")
+        calls = {"us-east-1": 0, "ap-east-1": 0}
+
+        def slow(region, count):
+            def get_count():
+                calls[region] += 1
+                if calls[region] == 1:
+                    sleep(0.5)
+                    return count
+                return 4 if region == "us-east-1" else None
+
+            return get_count
+
+        hook(args, {"eu-west-1": 3, "us-east-1": slow("us-east-1", 2), "ap-east-1": slow("ap-east-1", 1)})
+        skipped = []
+        with patch("lambdaguard.REGION_TIMEOUT", 0.1), patch("lambdaguard.print") as output:
+            usage = get_usage(args, {}, skipped)
+        # Slow regions are retried once, regions failing again are skipped and reported
+        self.assertEqual(calls, {"us-east-1": 2, "ap-east-1": 2})
+        self.assertEqual(list(usage.items()), [("eu-west-1", 3), ("us-east-1", 4)])
+        self.assertEqual(skipped, ["ap-east-1"])
+        self.assertIn("ap-east-1", output.call_args[0][0])
+
+    def test_get_reports(self):
+        args = parse_args("-r eu-west-1,us-east-1 -k id secret -w 4")
+        arns = [f"arn:aws:lambda:{region}:0:function:{_}" for region in ["eu-west-1", "us-east-1"] for _ in range(20)]
+        listings = {
+            region: [{"Functions": [{"FunctionArn": _} for _ in arns if region in _]}]
+            for region in ["eu-west-1", "us-east-1"]
+        }
+        lock = Lock()
+        started = []
+
+        def audit_stub(arn_str, config, args, identity, writes):
+            with lock:
+                started.append(arn_str)
+            index = arns.index(arn_str)
+            sleep(0.001 * (index % 5))  # Finish out of order
+            if index % 7 == 0:
+                return None  # Failed audit
+            return {"arn": arn_str}
+
+        reports = []
+        with patch("lambdaguard.audit", audit_stub):
+            usage = {"eu-west-1": 20, "us-east-1": 20}
+            for count, (arn_str, report) in enumerate(get_reports(args, usage, None, None, listings), 1):
+                # Audits are submitted at most workers * 2 ahead of the results
+                self.assertLessEqual(len(started) - count, args.workers * 2)
+                reports.append((arn_str, report))
+        # Listing order, one result per function, failures included
+        self.assertEqual([_[0] for _ in reports], arns)
+        self.assertEqual([_[1] for _ in reports], [None if i % 7 == 0 else {"arn": _} for i, _ in enumerate(arns)])
+
+    def test_audit_failure(self):
+        args = parse_args("-k id secret")
+        self.assertIsNone(audit("not an ARN", None, args, None, None))
+
+    def test_use_snapshot(self):
+        self.assertTrue(use_snapshot(parse_args("-r eu-west-1")))
+        self.assertFalse(use_snapshot(parse_args("-f arn:aws:lambda:eu-west-1:0:function:a")))
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp, "arns.txt")
+            arns = [f"arn:aws:lambda:eu-west-1:0:function:{_}" for _ in range(SNAPSHOT_MIN_FUNCTIONS)]
+            path.write_text("\n".join(arns[:3]) + "\n")
+            self.assertFalse(use_snapshot(parse_args(f"-i {path}")))
+            path.write_text("\n".join(arns) + "\n")
+            self.assertTrue(use_snapshot(parse_args(f"-i {path}")))
+
+    def test_carry_forward(self):
+        queue = "arn:aws:sqs:eu-west-1:0:queue"
+        report = {
+            "arn": "arn:aws:lambda:eu-west-1:0:function:a",
+            "role": "arn:aws:iam::0:role/a",
+            "fingerprint": "unchanged",
+            "policy": {"function": {}, "role": {"policies": []}},
+            "triggers": {"items": {queue: {}}},
+            "resources": {"services": ["logs"], "items": {}},
+        }
+        statement = {"Effect": "Allow", "Principal": {"AWS": "arn:aws:iam::0:root"}, "Action": "sqs:*"}
+
+        class Writes:
+            def get_for_lambda(self, arn):
+                return []
+
+        def get_queue_attributes(**kwargs):
+            policy = {"Statement": [statement]}
+            return AWSResponse("", 200, {}, None), {"Attributes": {"Policy": json.dumps(policy)}}
+
+        with TemporaryDirectory() as tmp:
+            args = parse_args(f"-o {tmp} -k id secret -I")
+            VisibilityReport(tmp).save(report)
+            client = clients.get_client("sqs", "eu-west-1", args.profile, args.keys[0], args.keys[1])
+            client.meta.events.register("before-call.sqs.GetQueueAttributes", get_queue_attributes)
+            arn = arnparse(report["arn"])
+            try:
+                with patch("lambdaguard.get_current_fingerprint", lambda *args: "unchanged"):
+                    carried = carry_forward(arn, {}, args, Writes())
+                    self.assertNotIn("high", carried["security"]["count"])
+                    # Queue policy changed between runs, function did not
+                    Scan.resources.clear()
+                    Scan.findings.clear()
+                    statement["Principal"] = "*"
+                    carried = carry_forward(arn, {}, args, Writes())
+                    self.assertEqual(carried["security"]["count"]["high"], 1)
+                    self.assertEqual(carried["writes"], {"count": 0, "items": {}})
+                with patch("lambdaguard.get_current_fingerprint", lambda *args: "changed"):
+                    self.assertIsNone(carry_forward(arn, {}, args, Writes()))
+            finally:
+                client.meta.events.unregister("before-call.sqs.GetQueueAttributes", get_queue_attributes)
+                Scan.resources.clear()
+                Scan.findings.clear()
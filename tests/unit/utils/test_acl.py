@@ -0,0 +1,84 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+
+from lambdaguard.utils.acl import ACL, ACTIONS
+
+
+class Client:
+    """
+    Mock IAM client
+    """
+
+    def __init__(self, denied):
+        self.denied = denied
+        self.calls = []
+
+    def get_paginator(self, paginator):
+        return self
+
+    def paginate(self, PolicyInputList, ActionNames, PaginationConfig):
+        self.calls.append(ActionNames)
+        if self.denied is None:
+            raise PermissionError("Simulator access denied")
+        yield {
+            "EvaluationResults": [
+                {"EvalActionName": _, "EvalDecision": "implicitDeny" if _ in self.denied else "allowed"}
+                for _ in ActionNames
+            ]
+        }
+
+
+class ACLHook(ACL):
+    """
+    Hooking AWS calls for data mocking
+    """
+
+    def __init__(self, arn, denied=[]):
+        self.denied = denied
+        super().__init__(arn)
+
+    def get_user_permissions(self):
+        self.client = Client(self.denied)
+        self.policy_documents = [
+            {"Version": "2012-10-17", "Statement": [{"Effect": "Allow", "Action": "lambda:List*", "Resource": "*"}]}
+        ]
+
+
+class Test(unittest.TestCase):
+    def test_resolve(self):
+        acl = ACLHook("arn:aws:iam::0:user/scanner", denied=["lambda:GetFunction"])
+        # Single batched call at startup
+        self.assertEqual(acl.client.calls, [ACTIONS])
+        # Allowed and denied decisions are cached
+        self.assertTrue(acl.allowed("lambda:GetFunctionConfiguration"))
+        self.assertFalse(acl.allowed("lambda:GetFunction"))
+        self.assertEqual(len(acl.client.calls), 1)
+
+    def test_allowed(self):
+        acl = ACLHook("arn:aws:iam::0:user/scanner", denied=["lambda:InvokeFunction"])
+        # Actions not resolved in advance
+        self.assertFalse(acl.allowed("lambda:InvokeFunction"))
+        self.assertFalse(acl.allowed("lambda:InvokeFunction"))
+        self.assertTrue(acl.allowed("lambda:ListTags"))
+        self.assertEqual(acl.client.calls[1:], [["lambda:InvokeFunction"], ["lambda:ListTags"]])
+
+    def test_evaluate(self):
+        # Simulator not allowed, policies are evaluated offline
+        acl = ACLHook("arn:aws:iam::0:user/scanner", denied=None)
+        self.assertTrue(acl.allowed("lambda:ListFunctions"))
+        self.assertFalse(acl.allowed("lambda:GetFunction"))
+        self.assertTrue(acl.allowed("lambda:ListTags"))
+        self.assertFalse(acl.allowed("lambda:InvokeFunction"))
@@ -0,0 +1,65 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import sleep
+
+from lambdaguard.utils import cache
+from lambdaguard.utils.cache import Cache
+
+
+class Test(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fixtures = Path(__file__).parents[2].joinpath("fixtures")
+
+    def test_get(self):
+        calls = []
+        items = Cache("test")
+        self.assertEqual(items.get("a", lambda: calls.append("a") or 1), 1)
+        self.assertEqual(items.get("a", lambda: calls.append("a") or 2), 1)
+        self.assertEqual(items.get("b", lambda: calls.append("b") or 3), 3)
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual((items.hits, items.misses, len(items)), (1, 2, 2))
+
+    def test_get_concurrent(self):
+        calls = []
+        items = Cache("test")
+
+        def factory():
+            calls.append(1)
+            sleep(0.05)
+            return object()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            values = list(executor.map(lambda _: items.get("key", factory), range(16)))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(set(map(id, values))), 1)
+        self.assertEqual((items.hits, items.misses), (15, 1))
+
+    def test_get_exception(self):
+        items = Cache("test")
+        with self.assertRaises(ValueError):
+            items.get("key", lambda: int("invalid"))
+        # Failures are not cached
+        self.assertEqual(items.get("key", lambda: 1), 1)
+
+    def test_clear(self):
+        items = Cache("test")
+        items.get("key", lambda: 1)
+        cache.clear()
+        self.assertEqual((items.hits, items.misses, len(items)), (0, 0, 0))
+        self.assertEqual(items.get("key", lambda: 2), 2)
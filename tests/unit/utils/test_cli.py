@@ -40,12 +40,21 @@ class Test(unittest.TestCase):
         self.assertIsNone(args.sonarqube)
         self.assertFalse(args.verbose)
         self.assertFalse(args.html)
+        self.assertEqual(args.workers, 1)
+        self.assertEqual(args.processes, 1)
+        self.assertFalse(args.incremental)
+        self.assertEqual(args.cache_mode, "off")
+        self.assertFalse(args.jsonl)
+        self.assertEqual(args.html_chunk_size, 0)
         # Parse custom arguments
-        args = parse_args("-o output -v -f function -k id secret")
+        args = parse_args("-o output -v -f function -k id secret -w 8 -P 4 -I")
         self.assertEqual(args.output, "output")
         self.assertEqual(args.function, "function")
         self.assertEqual(args.keys, ["id", "secret"])
         self.assertTrue(args.verbose)
+        self.assertEqual(args.workers, 8)
+        self.assertEqual(args.processes, 4)
+        self.assertTrue(args.incremental)
 
     def test_align(self):
         expected = "\r          \x1b[0;32mkey............ value\x1b[0m"
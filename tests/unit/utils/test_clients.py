@@ -0,0 +1,46 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from lambdaguard.utils import clients
+
+
+class Test(unittest.TestCase):
+    def test_get_client(self):
+        clients.configure()
+        # Shared per service and region
+        client = clients.get_client("lambda", "eu-west-1")
+        self.assertIs(client, clients.get_client("lambda", "eu-west-1"))
+        self.assertIsNot(client, clients.get_client("lambda", "us-east-1"))
+        self.assertIsNot(client, clients.get_client("sqs", "eu-west-1"))
+        # Shared between threads
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            shared = list(executor.map(lambda _: clients.get_client("kms", "eu-west-1"), range(32)))
+        self.assertEqual(len(set(map(id, shared))), 1)
+
+    def test_get_session(self):
+        session = clients.get_session(None, "id", "secret")
+        self.assertIs(session, clients.get_session(None, "id", "secret"))
+        self.assertIsNot(session, clients.get_session())
+
+    def test_configure(self):
+        clients.configure(max_pool_connections=32)
+        client = clients.get_client("lambda", "eu-west-1")
+        self.assertEqual(client.meta.config.max_pool_connections, 32)
+        # Reconfiguring creates new clients
+        clients.configure()
+        self.assertIsNot(client, clients.get_client("lambda", "eu-west-1"))
+        self.assertEqual(clients.get_client("lambda", "eu-west-1").meta.config.max_pool_connections, 10)
@@ -0,0 +1,86 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from botocore.awsrequest import AWSResponse
+
+from lambdaguard.utils import clients
+from lambdaguard.utils.diskcache import DiskCache
+
+
+class Response:
+    def __init__(self, body):
+        self.content = body
+
+    def stream(self):
+        return iter([self.content])
+
+
+class Test(unittest.TestCase):
+    def setUp(self):
+        self.tmp = TemporaryDirectory()
+        self.path = Path(self.tmp.name, "responses.sqlite")
+
+    def tearDown(self):
+        clients.configure()
+        self.tmp.cleanup()
+
+    def test_get(self):
+        cache = DiskCache(self.path, ttls={"s3": 60, "kms": -1})
+        cache.put("key", "s3", 200, {"Policy": "{}"})
+        self.assertEqual(cache.get("key", "s3"), (200, {"Policy": "{}"}))
+        self.assertIsNone(cache.get("missing", "s3"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # Expired
+        cache.put("expired", "kms", 200, {})
+        self.assertIsNone(cache.get("expired", "kms"))
+        # Persistent
+        self.assertEqual(DiskCache(self.path, ttls={"s3": 60}).get("key", "s3"), (200, {"Policy": "{}"}))
+
+    def test_evict(self):
+        cache = DiskCache(self.path, max_size=2048)
+        for idx in range(8):
+            cache.put(f"key{idx}", "s3", 200, {"Data": "x" * 500})
+            cache.get("key0", "s3")  # Recently used
+        self.assertLessEqual(cache.size, 2048)
+        self.assertEqual(len(cache), 3)
+        self.assertIsNotNone(cache.get("key0", "s3"))
+        self.assertIsNotNone(cache.get("key7", "s3"))
+        self.assertIsNone(cache.get("key1", "s3"))
+
+    def test_install(self):
+        sent = []
+
+        def send(request, **kwargs):
+            sent.append(request.url)
+            return AWSResponse(request.url, 200, {}, Response(b'{"Attributes": {"Policy": "{}"}}'))
+
+        def get_queue_attributes(mode):
+            clients.configure(hooks=[DiskCache(self.path, mode)])
+            client = clients.get_client("sqs", "eu-west-1", None, "id", "secret")
+            client.meta.events.register("before-send.sqs", send)
+            return client.get_queue_attributes(QueueUrl="https://queue", AttributeNames=["Policy"])["Attributes"]
+
+        self.assertEqual(get_queue_attributes("read"), {"Policy": "{}"})
+        self.assertEqual(len(sent), 1)  # Not stored
+        self.assertEqual(get_queue_attributes("write"), {"Policy": "{}"})
+        self.assertEqual(len(sent), 2)  # Stored
+        self.assertEqual(get_queue_attributes("read"), {"Policy": "{}"})
+        self.assertEqual(get_queue_attributes("write"), {"Policy": "{}"})
+        self.assertEqual(len(sent), 2)  # Cached
+        self.assertEqual(get_queue_attributes("refresh"), {"Policy": "{}"})
+        self.assertEqual(len(sent), 3)
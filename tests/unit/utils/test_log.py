@@ -15,8 +15,9 @@ specific language governing permissions and limitations under the License.
 import logging
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
 
-from lambdaguard.utils.log import configure_log, debug
+from lambdaguard.utils.log import append_log, configure_log, debug
 
 
 class Test(unittest.TestCase):
@@ -54,3 +55,14 @@ class Test(unittest.TestCase):
 
             elog = Path(self.logpath).read_text().strip()
             elog.endswith("ZeroDivisionError: division by zero")
+
+    def test_append_log(self):
+        with TemporaryDirectory() as tmp:
+            Path(tmp, "partial.log").write_text("[worker] partial\n")
+            configure_log(tmp)
+            logging.warning("before")
+            append_log(Path(tmp, "partial.log"))
+            logging.warning("after")  # Does not overwrite the merged log
+            lines = Path(tmp, "lambdaguard.log").read_text().split()
+            configure_log("/tmp")
+        self.assertEqual([_ for _ in lines if _.isalpha()], ["before", "partial", "after"])
@@ -15,7 +15,7 @@ specific language governing permissions and limitations under the License.
 import unittest
 from pathlib import Path
 
-from lambdaguard.utils.paginator import paginate
+from lambdaguard.utils.paginator import PAGE_SIZES, paginate
 
 
 class Client:
@@ -25,9 +25,11 @@ class Client:
 
     def __init__(self, marker=None):
         self.marker = marker
+        self.paginators = []
 
     def get_paginator(self, paginator):
-        return Paginator(self.marker)
+        self.paginators.append(Paginator(self.marker))
+        return self.paginators[-1]
 
 
 class Paginator:
@@ -37,8 +39,12 @@ class Paginator:
 
     def __init__(self, marker=None):
         self.marker = marker
+        self.kwargs = {}
 
     def paginate(self, **kwargs):
+        self.kwargs = kwargs
+        if self.marker == "error":
+            raise ValueError("Invalid marker")
         if self.marker:
             yield {"Page": {}, "NextMarker": self.marker}
             self.marker = None
@@ -64,3 +70,34 @@ class Test(unittest.TestCase):
         self.assertEqual(next(pages), {"Page": {}})
         with self.assertRaises(StopIteration):
             next(pages)
+
+    def test_paginate_page_size(self):
+        # Service maximum page size
+        client = Client()
+        list(paginate(client, "list_functions"))
+        self.assertEqual(client.paginators[0].kwargs["PaginationConfig"], {"PageSize": PAGE_SIZES["list_functions"]})
+        # Custom page size
+        client = Client()
+        list(paginate(client, "list_functions", page_size=5, FunctionVersion="ALL"))
+        self.assertEqual(client.paginators[0].kwargs["PaginationConfig"], {"PageSize": 5})
+        self.assertEqual(client.paginators[0].kwargs["FunctionVersion"], "ALL")
+        # Unknown paginator uses the service default
+        client = Client()
+        list(paginate(client, "list_unknown"))
+        self.assertEqual(client.paginators[0].kwargs["PaginationConfig"], {})
+        # Single paginator for all pages
+        client = Client("multiple")
+        self.assertEqual(len(list(paginate(client, "list_functions"))), 2)
+        self.assertEqual(len(client.paginators), 1)
+
+    def test_paginate_prefetch(self):
+        # Same pages as without prefetching
+        pages = paginate(Client("multiple"), None, prefetch=True)
+        self.assertEqual(next(pages), {"Page": {}, "NextMarker": "multiple"})
+        self.assertEqual(next(pages), {"Page": {}})
+        with self.assertRaises(StopIteration):
+            next(pages)
+        # Errors are raised to the caller
+        pages = paginate(Client("error"), None, prefetch=True)
+        with self.assertRaises(ValueError):
+            next(pages)
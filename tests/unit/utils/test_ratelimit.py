@@ -0,0 +1,81 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from time import monotonic
+
+from botocore.awsrequest import AWSResponse
+
+from lambdaguard.utils import clients, ratelimit
+from lambdaguard.utils.ratelimit import MIN_RATE, RateLimiter, TokenBucket
+
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.headers = {"x-amzn-ErrorType": "TooManyRequestsException"} if status_code == 429 else {}
+        self.content = body
+
+    def stream(self):
+        return iter([self.content])
+
+
+class Test(unittest.TestCase):
+    def test_acquire(self):
+        bucket = TokenBucket(rate=20)
+        start = monotonic()
+        for _ in range(30):
+            bucket.acquire()
+        # 20 tokens in the bucket, 10 more at 20/s
+        self.assertGreaterEqual(monotonic() - start, 0.4)
+
+    def test_adaptive(self):
+        bucket = TokenBucket(rate=8)
+        bucket.throttled()
+        self.assertEqual(bucket.rate, 4)
+        self.assertEqual(bucket.throttles, 1)
+        bucket.succeeded()
+        self.assertEqual(bucket.rate, 4.25)
+        for _ in range(10):
+            bucket.throttled()
+        self.assertEqual(bucket.rate, MIN_RATE)
+
+    def test_get_bucket(self):
+        limiter = RateLimiter()
+        bucket = limiter.get_bucket("lambda", "eu-west-1", "ListFunctions")
+        self.assertIs(bucket, limiter.get_bucket("lambda", "eu-west-1", "ListFunctions"))
+        self.assertIsNot(bucket, limiter.get_bucket("lambda", "eu-west-1", "GetFunction"))
+        self.assertIsNot(bucket, limiter.get_bucket("lambda", "us-east-1", "ListFunctions"))
+        self.assertEqual(bucket.rate, ratelimit.RATES["lambda"])
+
+    def test_install(self):
+        clients.configure()
+        client = clients.get_client("lambda", "eu-west-1", None, "id", "secret")
+        self.assertEqual(client.meta.config.retries["mode"], "adaptive")
+        responses = [
+            Response(429, b'{"message": "Rate exceeded"}'),
+            Response(200, b'{"AccountLimit": {}, "AccountUsage": {}}'),
+        ]
+
+        def send(request, **kwargs):
+            _ = responses.pop(0)
+            return AWSResponse(request.url, _.status_code, _.headers, _)
+
+        # Registered after the limiter, so tokens are taken before sending
+        client.meta.events.register("before-send.lambda", send)
+        client.get_account_settings()
+        bucket = ratelimit.limiter.get_bucket("lambda", "eu-west-1", "GetAccountSettings")
+        self.assertEqual(bucket.throttles, 1)
+        self.assertEqual(ratelimit.limiter.throttles, 1)
+        self.assertEqual(responses, [])
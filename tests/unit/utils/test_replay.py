@@ -0,0 +1,71 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import unittest
+from tempfile import TemporaryDirectory
+from time import monotonic
+
+from botocore.awsrequest import AWSResponse
+
+from lambdaguard.utils import clients
+from lambdaguard.utils.replay import Recorder, Replayer
+
+POLICY = "%7B%22Statement%22%3A%20%5B%5D%7D"  # URL-quoted as returned by IAM
+
+
+class Response:
+    def __init__(self, body):
+        self.content = body
+
+    def stream(self):
+        return iter([self.content])
+
+
+def send(request, **kwargs):
+    body = f"""<GetRolePolicyResponse><GetRolePolicyResult>
+        <RoleName>role</RoleName><PolicyName>policy</PolicyName><PolicyDocument>{POLICY}</PolicyDocument>
+    </GetRolePolicyResult></GetRolePolicyResponse>"""
+    return AWSResponse(request.url, 200, {}, Response(body.encode("utf-8")))
+
+
+def no_network(request, **kwargs):
+    raise AssertionError("Replay must not send requests")
+
+
+class Test(unittest.TestCase):
+    def tearDown(self):
+        clients.configure()
+
+    def get_role_policy(self, hook, handler, policy="policy"):
+        clients.configure(hooks=[hook])
+        client = clients.get_client("iam", None, None, "id", "secret")
+        client.meta.events.register("before-send.iam", handler)
+        return client.get_role_policy(RoleName="role", PolicyName=policy)
+
+    def test_replay(self):
+        with TemporaryDirectory() as tmp:
+            recorded = self.get_role_policy(Recorder(tmp), send)
+            self.assertEqual(recorded["PolicyDocument"], {"Statement": []})
+
+            replayed = self.get_role_policy(Replayer(tmp), no_network)
+            self.assertEqual(replayed["PolicyDocument"], {"Statement": []})
+            self.assertEqual(replayed["RoleName"], "role")
+            # Not recorded
+            with self.assertRaises(Exception) as error:
+                self.get_role_policy(Replayer(tmp), no_network, "other")
+            self.assertIn("ReplayNotFound", str(error.exception))
+            # Injected latency
+            start = monotonic()
+            self.get_role_policy(Replayer(tmp, latency=0.2), no_network)
+            self.assertGreaterEqual(monotonic() - start, 0.2)
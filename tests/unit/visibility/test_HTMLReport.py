@@ -0,0 +1,99 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lambdaguard.security.Report import SecurityReport
+from lambdaguard.visibility.HTMLReport import Chunks, HTMLReport, iter_json
+from lambdaguard.visibility.Report import VisibilityReport
+
+
+def report(name):
+    return {
+        "arn": f"arn:aws:lambda:eu-west-1:0:function:{name}",
+        "name": name,
+        "description": "",
+        "region": "eu-west-1",
+        "runtime": "python3.8",
+        "handler": "app.handler",
+        "role": "arn:aws:iam::0:role/a",
+        "layers": [{"arn": f"arn:aws:lambda:eu-west-1:0:layer:{name}:1", "description": "layer"}],
+        "triggers": {"services": []},
+        "resources": {"services": []},
+        "security": {"items": [{"level": "high", "text": "finding", "where": name}]},
+        "policy": {"function": {}, "role": {}},
+    }
+
+
+class Test(unittest.TestCase):
+    def test_iter_json(self):
+        items = [{"index": str(_), "text": "a, [b] {c}\n" * _, "where": "]"} for _ in range(20)]
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp, "security.json")
+            path.write_text(json.dumps(items, indent=4))
+            for chunk_size in (1, 7, 4096):
+                self.assertEqual(list(iter_json(path, chunk_size)), items)
+            path.write_text("[]")
+            self.assertEqual(list(iter_json(path, 1)), [])
+
+    def test_write_template(self):
+        report = HTMLReport("/tmp")
+        sections = {"{a}": lambda f: f.write("A{b}")}
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp, "out.html")
+            with path.open("w") as f:
+                report.write_template(f, "<{a}>{b}{ x }", sections)
+            self.assertEqual(path.read_text(), "<A{b}>{b}{ x }")
+
+    def test_chunks(self):
+        with TemporaryDirectory() as tmp:
+            chunks = Chunks(tmp, "security", 2)
+            positions = [chunks.append({"html": str(_)}, level=level) for _, level in enumerate("hhhml")]
+            chunks.close()
+            self.assertEqual(positions, [0, 1, 2, 3, 4])
+            self.assertEqual(
+                chunks.manifest,
+                [
+                    {"id": "security-0", "count": 2, "level": "h"},
+                    {"id": "security-1", "count": 1, "level": "h"},
+                    {"id": "security-2", "count": 1, "level": "m"},
+                    {"id": "security-3", "count": 1, "level": "l"},
+                ],
+            )
+            data = Path(tmp, "security-0.js").read_text()
+        prefix, items = data.split(", ", 1)
+        self.assertEqual(prefix, 'LambdaGuard.chunk("security-0"')
+        self.assertEqual(json.loads(items.rstrip().rstrip(";").rstrip(")")), [{"html": "0"}, {"html": "1"}])
+
+    def test_save_chunks(self):
+        names = [str(_) for _ in range(5)]
+        with TemporaryDirectory() as tmp:
+            visibility = VisibilityReport(tmp)
+            for name in names:
+                visibility.save(report(name))
+            visibility.save_index()
+            SecurityReport(tmp).save()
+            statistics = {"lambdas": 5, "layers": 5, "security": {"count": 5, "items": {"high": 5, "info": 0}}}
+            Path(tmp, "statistics.json").write_text(json.dumps(statistics))
+            HTMLReport(tmp).save(chunk_size=2)
+            shell = Path(tmp, "report.html").read_text()
+            chunks = sorted(_.name for _ in Path(tmp, "report").iterdir())
+        # Functions, layers and findings are only in the data chunks
+        self.assertNotIn("function:0", shell)
+        self.assertNotIn("layer:0", shell)
+        for section in ["functions", "layers", "security"]:
+            self.assertEqual([_ for _ in chunks if _.startswith(section)], [f"{section}-{_}.js" for _ in range(3)])
@@ -0,0 +1,93 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lambdaguard.visibility.Report import VisibilityReport, load_index, load_report
+
+
+class Test(unittest.TestCase):
+    def test_merge(self):
+        with TemporaryDirectory() as tmp:
+            partial = VisibilityReport(Path(tmp, "partial"))
+            partial.save({"arn": "arn:aws:lambda:eu-west-1:0:function:a"})
+            partial.save({"arn": "arn:aws:lambda:eu-west-1:0:function:b"})
+
+            visibility = VisibilityReport(tmp)
+            visibility.save({"arn": "arn:aws:lambda:us-east-1:0:function:c"})
+            visibility.merge(Path(tmp, "partial"))
+            visibility.save_index()
+            index = json.loads(Path(tmp, "index.json").read_text())
+            reports = sorted(_.stem for _ in Path(tmp, "reports").iterdir())
+            moved = list(Path(tmp, "partial", "reports").iterdir())
+        self.assertEqual(
+            list(index.values()),
+            [
+                "arn:aws:lambda:us-east-1:0:function:c",
+                "arn:aws:lambda:eu-west-1:0:function:a",
+                "arn:aws:lambda:eu-west-1:0:function:b",
+            ],
+        )
+        self.assertEqual(reports, sorted(index.keys()))
+        self.assertEqual(moved, [])
+
+    def test_load(self):
+        with TemporaryDirectory() as tmp:
+            previous = VisibilityReport(tmp)
+            previous.save({"arn": "arn:aws:lambda:eu-west-1:0:function:a", "fingerprint": {}})
+            previous.save({"arn": "arn:aws:lambda:eu-west-1:0:function:b", "fingerprint": {}})
+
+            visibility = VisibilityReport(tmp)
+            report = visibility.load("arn:aws:lambda:eu-west-1:0:function:a")
+            self.assertEqual(report, {"arn": "arn:aws:lambda:eu-west-1:0:function:a", "fingerprint": {}})
+            self.assertIsNone(visibility.load("arn:aws:lambda:eu-west-1:0:function:c"))
+            # Reports of deleted functions are removed
+            visibility.save(report)
+            visibility.prune()
+            reports = [_.stem for _ in Path(tmp, "reports").iterdir()]
+        self.assertEqual(reports, list(visibility.index.keys()))
+
+    def test_journal(self):
+        arns = [f"arn:aws:lambda:eu-west-1:0:function:{_}" for _ in range(3)]
+        with TemporaryDirectory() as tmp:
+            visibility = VisibilityReport(tmp)
+            for arn in arns:
+                visibility.save({"arn": arn})
+            # Readable before compaction, e.g. after a crash
+            self.assertFalse(Path(tmp, "index.json").exists())
+            self.assertEqual(list(load_index(tmp).values()), arns)
+            with Path(tmp, "index.jsonl").open("a") as f:
+                f.write('["cut short')
+            self.assertEqual(list(load_index(tmp).values()), arns)
+
+            visibility.save_index()
+            self.assertFalse(Path(tmp, "index.jsonl").exists())
+            self.assertEqual(json.loads(Path(tmp, "index.json").read_text()), visibility.index)
+            self.assertEqual(load_index(tmp), visibility.index)
+
+    def test_journal_load(self):
+        arns = [f"arn:aws:lambda:eu-west-1:0:function:{_}" for _ in range(3)]
+        with TemporaryDirectory() as tmp:
+            Path(tmp, "index.jsonl").write_text('["stale", "arn"]\n')
+            visibility = VisibilityReport(tmp)
+            visibility.save({"arn": arns[0]})
+            # Loading previous reports, like incremental runs do, keeps the journal
+            self.assertEqual(load_report(tmp, arns[0]), {"arn": arns[0]})
+            self.assertIsNone(load_report(tmp, arns[2]))
+            VisibilityReport(tmp).load(arns[0])
+            visibility.save({"arn": arns[1]})
+            self.assertEqual(list(load_index(tmp).values()), arns[:2])
@@ -0,0 +1,72 @@
+"""
+Copyright 2020 Skyscanner Ltd
+
+Licensed under the Apache License, Version 2.0 (the "License"); you may not use
+this file except in compliance with the License.
+You may obtain a copy of the License at
+
+http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software distributed
+under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR
+CONDITIONS OF ANY KIND, either express or implied. See the License for the
+specific language governing permissions and limitations under the License.
+"""
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from lambdaguard.visibility.Statistics import Statistics
+
+
+def report(region, runtime, security):
+    return {
+        "region": region,
+        "runtime": runtime,
+        "layers": [],
+        "triggers": {"items": {"arn:aws:sqs:eu-west-1:0:queue": {}}},
+        "resources": {"items": {"*": {}}},
+        "security": {"count": security},
+    }
+
+
+class Test(unittest.TestCase):
+    def test_merge(self):
+        with TemporaryDirectory() as tmp:
+            partials = [Path(tmp, "eu-west-1"), Path(tmp, "us-east-1")]
+            for _ in partials:
+                _.mkdir()
+            partial = Statistics(partials[0])
+            partial.parse(report("eu-west-1", "python3.8", {"high": 1}))
+            partial.save()
+            partial = Statistics(partials[1])
+            partial.parse(report("us-east-1", "python3.8", {"high": 2, "low": 1}))
+            partial.parse(report("us-east-1", "nodejs12.x", {}))
+            partial.save()
+
+            statistics = Statistics(tmp)
+            for _ in partials:
+                statistics.merge(_)
+            statistics.save()
+            saved = json.loads(Path(tmp, "statistics.json").read_text())
+        self.assertEqual(saved, statistics.statistics)
+        self.assertEqual(saved["lambdas"], 3)
+        self.assertEqual(saved["regions"], {"count": 3, "items": {"eu-west-1": 1, "us-east-1": 2}})
+        self.assertEqual(saved["runtimes"], {"count": 3, "items": {"python3.8": 2, "nodejs12.x": 1}})
+        self.assertEqual(saved["triggers"], {"count": 3, "items": {"sqs": 3}})
+        self.assertEqual(saved["resources"], {"count": 0, "items": {}})
+        self.assertEqual(saved["security"], {"count": 4, "items": {"high": 3, "low": 1}})
+
+    def test_save(self):
+        with TemporaryDirectory() as tmp:
+            statistics = Statistics(tmp, interval=None)
+            statistics.parse(report("eu-west-1", "python3.8", {"high": 1}))
+            # Accumulated in memory
+            self.assertFalse(Path(tmp, "statistics.json").exists())
+            statistics.interval = 0
+            statistics.parse(report("eu-west-1", "python3.8", {"high": 1}))
+            saved = json.loads(Path(tmp, "statistics.json").read_text())
+            self.assertEqual(saved["lambdas"], 2)
+            self.assertEqual(saved["security"], {"count": 2, "items": {"high": 2}})
+            self.assertEqual([_.name for _ in Path(tmp).iterdir()], ["statistics.json"])